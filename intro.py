@@ -1,7 +1,5 @@
 import streamlit as st
-from st_pages import Page, add_page_title, show_pages, show_pages_from_config
 
-import src.scripts.plot_themes as thm
 import src.scripts.utils as utl
 
 st.set_page_config(  # Must be called as the first Streamlit command in your sript
@@ -10,12 +8,10 @@ st.set_page_config(  # Must be called as the first Streamlit command in your sri
     layout="wide",
 )
 
-show_pages_from_config()
+with utl.timed("register pages"):
+    utl.register_pages()
 
-utl.local_css("src/styles/styles_home.css")
-utl.external_css(
-    "https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.3/css/all.min.css"
-)
+utl.bundled_css("home")
 
 
 s1, c1, c2 = utl.wide_col()
@@ -72,13 +68,13 @@ with c1:
         f"""
         Please send me feedback:<br>
     <a href="{linkedin_url}" target="_blank">
-        <i class="fab fa-linkedin fa-lg"></i>
+        <i class="icon icon-linkedin icon-lg"></i>
     </a>
     <a href="{email_url}" target="_blank">
-        <i class="fas fa-envelope fa-lg"></i>
+        <i class="icon icon-envelope icon-lg"></i>
     </a>
     <a href="{github_url}" target="_blank">
-        <i class="fab fa-github fa-lg"></i>
+        <i class="icon icon-github icon-lg"></i>
     </a>
     """,
         unsafe_allow_html=True,
@@ -104,11 +100,12 @@ with c2:
 
     c2_1, s2_1, c2_2 = st.columns((1, 0.05, 1))
 
-    with c2_1:
-        st.image("src/images/intro_MWG.jpg", width=300)
+    with utl.timed("textbook images"):
+        with c2_1:
+            utl.image("src/images/intro_MWG.jpg", width=300)
 
-    with c2_2:
-        st.image("src/images/intro_osborne_rubinstein.jpg", width=300)
+        with c2_2:
+            utl.image("src/images/intro_osborne_rubinstein.jpg", width=300)
 
 
 # Other references
@@ -343,3 +340,5 @@ with c2:
         """,
             unsafe_allow_html=True,
         )
+
+utl.profile_panel()
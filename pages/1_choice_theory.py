@@ -1,17 +1,14 @@
-import random
-from itertools import combinations
+import io
+import time
+import uuid
 
-import numpy as np
-import pandas as pd
-import src.scripts.plot_themes as thm
+import src.choice as chc
 import src.scripts.utils as utl
 import streamlit as st
-from matplotlib import pyplot as plt
-from st_pages import add_page_title
 
 ### PAGE CONFIGS ###
 utl.micro_page_config()
-utl.local_css("src/styles/styles_pages.css")
+utl.bundled_css("pages")
 
 # create one column with consistent width
 _, col_top, _ = utl.wide_col()
@@ -50,7 +47,7 @@ with c1:
 
 _, warp_col, _ = st.columns((0.2, 1, 0.2))
 
-with warp_col:
+with warp_col, utl.timed("fruit game"):
     st.markdown(
         "<h3 style='text-align: center'>WARP checker</h3>",
         unsafe_allow_html=True,
@@ -61,7 +58,7 @@ with warp_col:
     # 2. Display a bundle of items to the user.
     # 3. User selects the items they prefer.
     # 4. Record the user's choice.
-    # 5. Remove shown bundle from the list
+    # 5. Draw the next bundle that has not been shown yet
     # 6. Do not allow empty choices
     # 7. Repeat steps 2-6 until all bundles have been shown.
     # 8. Check if the user chose consistently according to WARP in all of the bundles.
@@ -71,34 +68,45 @@ with warp_col:
     # Items and Bundles
     items = ["Apple", "Banana", "Mango", "Orange"]
 
-    def generate_bundles(items):
-        """Generate bundles of size 2 and 3 from the given items."""
-        bundles = []
-        for i in range(3, 4):
-            bundles.extend(combinations(items, i))
-        return bundles
-
-    BUNDLES = generate_bundles(items)
+    # Every confirmed choice is logged to disk, one log shared by all sessions
+    @st.cache_resource
+    def choice_log():
+        return chc.ChoiceLog("data/choices.sqlite")
 
     # Session state to keep track of choices, the current bundle, and shown bundles
     def initialize_session_state():
+        st.session_state.session_id = uuid.uuid4().hex
         st.session_state.choices = []
         st.session_state.shown_bundles = []
-        st.remaining_bundles = BUNDLES
-        st.session_state.current_bundle = random.choice(BUNDLES)
+        # bundles of size 3, each picked to test the choices made so far
+        st.session_state.scheduler = chc.AdaptiveScheduler(items, sizes=(3,))
+        st.session_state.current_bundle = st.session_state.scheduler.next_bundle()
         st.session_state.end_choices = False
+        # WARP violations, updated with each confirmed choice
+        st.session_state.warp_index = chc.WarpIndex()
+        st.session_state.warp_checked = False
 
     if "shown_bundles" not in st.session_state:
         initialize_session_state()
 
     bundle_number = len(st.session_state.shown_bundles) + 1
+    n_bundles = len(st.session_state.scheduler)
 
-    if bundle_number <= len(BUNDLES):
+    if st.session_state.current_bundle is not None:
         # Displaying the current bundle
         st.write(
-            f"Bundle {bundle_number} of {len(BUNDLES)}. Please select one or more items."
+            f"Bundle {bundle_number} (of at most {n_bundles}). "
+            "Please select one or more items."
         )
 
+        if bundle_number > 1:
+            n_violations = len(st.session_state.warp_index)
+            st.caption(
+                f"Live check: {n_violations} WARP violation(s) so far."
+                if n_violations
+                else "Live check: your choices are consistent so far."
+            )
+
         # Displaying checkboxes for the items in the current bundle
         selected_items = []
         for item in st.session_state.current_bundle:
@@ -113,167 +121,241 @@ with warp_col:
             # Record choices and shown bundles
             st.session_state.choices.append(set(selected_items))
             st.session_state.shown_bundles.append(st.session_state.current_bundle)
-
-            # Remove current bundle from the remaining ones
-            st.session_state.remaining_bundles = [
-                bundle
-                for bundle in BUNDLES
-                if bundle not in st.session_state.shown_bundles
-            ]
-
-            # Check if there are any remaining bundles left and pick one if so
-            if st.session_state.remaining_bundles:
-                st.session_state.current_bundle = random.choice(
-                    st.session_state.remaining_bundles
+            with utl.timed("WARP update"):
+                st.session_state.warp_index.add(
+                    st.session_state.current_bundle, set(selected_items)
+                )
+            with utl.timed("bundle scheduler"):
+                st.session_state.scheduler.record(
+                    st.session_state.current_bundle, set(selected_items)
                 )
+            choice_log().append(
+                st.session_state.session_id,
+                bundle_number,
+                st.session_state.current_bundle,
+                set(selected_items),
+            )
+
+            # Pick the next bundle, or None once the verdict is decided
+            with utl.timed("bundle scheduler"):
+                scheduler = st.session_state.scheduler
+                st.session_state.current_bundle = scheduler.next_bundle()
             st.rerun()
     else:
-        st.write("All bundles have been shown.")
+        if bundle_number <= n_bundles:
+            st.write(
+                "Your choices already settle the question, "
+                "so the remaining bundles were skipped."
+            )
+        else:
+            st.write("All bundles have been shown.")
         st.session_state.end_choices = True
 
-    def generate_html_table(bundles, choices):
-        """Generate an HTML table from lists of bundles and choices."""
-        html_table = '<table border="1">'
-
-        # Add the headers
-        html_table += "<thead><tr><th>Bundles</th><th>Choices</th></tr></thead><tbody>"
-
-        # Add the rows of data
-        for bundle, choice in zip(bundles, choices):
-            bundle_str = str(bundle).replace("'", "")
-            choice_str = str(choice).replace("'", "")
-
-            html_table += f"<tr><td>{bundle_str}</td><td>{choice_str}</td></tr>"
-
-            # html_table += f"<tr><td>{bundle}</td><td>{choice}</td></tr>"
-
-        # Close the table
-        html_table += "</tbody></table>"
-
-        return html_table
+    # Rows of the choice history to show per page
+    HISTORY_PAGE_SIZE = 20
 
     # After you have collected all bundles and choices:
     if st.session_state.end_choices:
-        html_table = generate_html_table(
-            st.session_state.shown_bundles, st.session_state.choices
+        # Render only the visible page, so reruns stay fast for long histories
+        n_rows = len(st.session_state.shown_bundles)
+        n_pages = max(-(-n_rows // HISTORY_PAGE_SIZE), 1)
+        first = (st.session_state.get("history_page", 1) - 1) * HISTORY_PAGE_SIZE
+        html_table = chc.generate_html_table(
+            st.session_state.shown_bundles,
+            st.session_state.choices,
+            start=first,
+            stop=first + HISTORY_PAGE_SIZE,
+            highlight=st.session_state.warp_index.rows,
         )
         st.markdown(html_table, unsafe_allow_html=True)
+        if st.session_state.warp_index.rows:
+            st.caption("Highlighted bundles are part of a WARP violation.")
+        if n_pages > 1:
+            st.number_input(
+                f"Page (of {n_pages})",
+                min_value=1,
+                max_value=n_pages,
+                key="history_page",
+            )
+
+        # The same history as a Parquet file, one row per bundle, built once
+        if "history_parquet" not in st.session_state:
+            parquet = io.BytesIO()
+            chc.write_parquet(
+                chc.ChoiceDataset.from_lists(
+                    st.session_state.shown_bundles, st.session_state.choices, items
+                ),
+                parquet,
+            )
+            st.session_state.history_parquet = parquet.getvalue()
+        st.download_button(
+            "Download your choices (Parquet)",
+            st.session_state.history_parquet,
+            file_name="choices.parquet",
+        )
 
-    def check_warp_pairwise(
-        x,
-        y,
-        bundles=st.session_state.shown_bundles,
-        choices=st.session_state.choices,
-    ):
-        """Check if the user chose consistently according to WARP in all of the bundles."""
-        bundles_xy = []
-        rel_choices = []
-        # bundle_index = []
-
-        for i in range(len(bundles)):
-            if (x in bundles[i]) and (y in bundles[i]):
-                bundles_xy.append(bundles[i])
-                rel_choices.append(choices[i])
-                # bundle_index.append(i)
-
-        # st.write(f"Bundles that contain both {x} and {y}: {bundles_xy}")
-        # st.write(f"Respective choices: {rel_choices}")
-
-        # check if x, y were chosen at least once across relevant bundles
-        choose_x = [(b, c) for b, c in zip(bundles_xy, rel_choices) if x in c]
-        choose_y = [(b, c) for b, c in zip(bundles_xy, rel_choices) if y in c]
-        len_x = len(choose_x)
-        len_y = len(choose_y)
-
-        if len_x == 0 or len_y == 0:
-            return {
-                "condition": False,
-                "reason": "Impossible to detect WARP violation.",
-            }
-
-        # conditions for violation of WARP
-        # either x or y was chosen in all bundles or both were chosen in all bundles
-        warp_A = []
-        warp_B = []
-
-        if 0 < len_x < len(rel_choices):
-            # if condition fails, then it meanst that x was chosen in at least one but not all bundles
-            for bundle, choice in zip(bundles_xy, rel_choices):
-                if x in choice:
-                    warp_A = [bundle, choice]
-                elif y in choice:
-                    warp_B = [bundle, choice]
-
-            return {
-                "condition": True,
-                "reason": "WARP violation detected!",
-                "item_1": x,
-                "item_2": y,
-                "chosen": warp_A,
-                "not_chosen": warp_B,
-            }
-
-        elif 0 < len_y < len(rel_choices):
-            # if condition fails, then it meanst that y was chosen in at least one but not all bundles
-            for bundle, choice in zip(bundles_xy, rel_choices):
-                if y in choice:
-                    warp_A = [bundle, choice]
-                elif x in choice:
-                    warp_B = [bundle, choice]
-
-            return {
-                "condition": True,
-                "reason": "WARP violation detected!",
-                "item_1": y,
-                "item_2": x,
-                "chosen": warp_A,
-                "not_chosen": warp_B,
-            }
+    # How many violations to list, and how many to show per page
+    MAX_VIOLATIONS = 100
+    PAGE_SIZE = 5
+
+    def show_paginated(violations, show, key):
+        """Show one page of violations as they stream in, with a page selector below."""
+        page = st.session_state.get(key, 1)
+        first = (page - 1) * PAGE_SIZE
+        n = 0
+        for n, violation in enumerate(violations, start=1):
+            if first < n <= first + PAGE_SIZE:
+                show(violation)
+
+        n_pages = -(-n // PAGE_SIZE)
+        if n_pages > 1:
+            st.number_input(
+                f"Page (of {n_pages})", min_value=1, max_value=n_pages, key=key
+            )
+        limit_str = (
+            f" (listing at most {MAX_VIOLATIONS})" if n == MAX_VIOLATIONS else ""
+        )
+        st.caption(f"{n} violation(s) found{limit_str}.")
+
+    def show_warp(warp):
+        st.markdown(
+            f"""**Explanation:**<br>
+        Let's call bundles $A=$ {warp["chosen"][0]} and $B=$ {warp["not_chosen"][0]}<br>
+        Your choices were:<br>
+        $C(A)=C${warp["chosen"][0]} $=${warp["chosen"][1]}<br>
+        $C(B)=C${warp["not_chosen"][0]} $=${warp["not_chosen"][1]}<br>                                                          
+        Both {warp["item_1"]} and {warp['item_2']} were available in bundles $A$ and $B$.<br>
+        {warp["item_1"]} was among choices from $A$ and {warp["item_2"]} was among choices from $B$.<br>
+        However {warp["item_1"]} was not chosen from $B$.<br>
+        Therefore, WARP is violated.""",
+            unsafe_allow_html=True,
+        )
 
-        else:
-            return {"condition": False, "reason": "WARP was not violated."}
+    # Check results shared by all sessions, so identical histories are checked once
+    @st.cache_resource
+    def check_cache():
+        return chc.CheckCache()
+
+    # Checks run in the background, so a long check doesn't block the page
+    @st.cache_resource
+    def check_jobs():
+        return chc.JobPool()
+
+    def consistency_report(job, bundles, choices, warp_index):
+        """WARP violations, or else the random chooser power and GARP cycles."""
+        # violations are tracked as choices come in, see src/choice/incremental.py
+        warp = warp_index.violations(bundles, choices, limit=MAX_VIOLATIONS)
+        if warp:
+            return {"warp": warp}
+
+        # how often a random chooser fails on the same bundles
+        job.report(0.1, "Simulating a random chooser...")
+        power = chc.bronars_power(
+            bundles, draws=100_000, multiple=True, seed=0, processes=1
+        )["power"]
+
+        # WARP compares two bundles at a time, GARP also catches longer cycles
+        job.report(0.5, "Looking for cycles...")
+        garp = []
+        for cycle in chc.iter_garp_violations(
+            bundles, choices, items, limit=MAX_VIOLATIONS
+        ):
+            job.check_cancelled()
+            garp.append(cycle)
+            job.report(0.5 + 0.5 * len(garp) / MAX_VIOLATIONS, partial=garp)
+        return {"warp": [], "power": power, "garp": garp}
+
+    def run_check(job, cache, key, *args):
+        return cache.get_or_compute(key, lambda: consistency_report(job, *args))
+
+    def show_cycle(garp):
+        cycle = garp["cycle"]
+        cycle_str = r" $\succeq$ ".join(cycle[:-1])
+        st.markdown(rf"{cycle_str} $\succ$ {cycle[-1]}", unsafe_allow_html=True)
 
     if st.session_state.end_choices:
-        # loop through all pairs of items until a WARP violation is found
+        # list every WARP violation found, page by page
         st.markdown("<br>", unsafe_allow_html=True)
 
+        # keep the results on screen while paging through them
         if st.button("Check for WARP violations", type="primary"):
-            for x, y in combinations(items, 2):
-                warp = check_warp_pairwise(x, y)
-                # st.write("looping", x, y)
-                # st.write(f"""{warp["reason"]}""")
+            st.session_state.warp_checked = True
+
+        running = False
+        if st.session_state.warp_checked:
+            # identical histories share one job and one result, see src/choice/memo.py
+            cache = check_cache()
+            if "check_job" not in st.session_state:
+                key = chc.history_key(
+                    st.session_state.shown_bundles, st.session_state.choices
+                )
+                st.session_state.check_job = check_jobs().submit(
+                    key,
+                    run_check,
+                    cache,
+                    key,
+                    st.session_state.shown_bundles,
+                    st.session_state.choices,
+                    st.session_state.warp_index,
+                )
+            job = st.session_state.check_job
+
+            # quick checks finish before the first poll
+            with utl.timed("WARP check wait"):
+                running = not job.wait(timeout=0.1)
+            if running:
+                st.progress(job.progress, text=job.message or "Checking...")
+                if job.partial:
+                    st.caption(f"{len(job.partial)} cycle(s) found so far.")
+            else:
+                report = job.result()
 
-                if warp["condition"]:
+                if report["warp"]:
                     st.write("Your choices were inconsistent according to WARP.😔")
-
-                    st.markdown(
-                        f"""**Explanation:**<br>
-                    Let's call bundles $A=$ {warp["chosen"][0]} and $B=$ {warp["not_chosen"][0]}<br>
-                    Your choices were:<br>
-                    $C(A)=C${warp["chosen"][0]} $=${warp["chosen"][1]}<br>
-                    $C(B)=C${warp["not_chosen"][0]} $=${warp["not_chosen"][1]}<br>                                                          
-                    Both {warp["item_1"]} and {warp['item_2']} were available in bundles $A$ and $B$.<br>
-                    {warp["item_1"]} was among choices from $A$ and {warp["item_2"]} was among choices from $B$.<br>
-                    However {warp["item_1"]} was not chosen from $B$.<br>
-                    Therefore, WARP is violated.""",
-                        unsafe_allow_html=True,
+                    show_paginated(report["warp"], show_warp, key="warp_page")
+                else:
+                    st.write("No WARP violations detected.🥳")
+                    st.caption(
+                        f"A chooser picking at random would violate WARP on these "
+                        f"bundles {report['power']:.0%} of the time."
                     )
 
-                    break  # exit the loop once the first violation is found
-            else:
-                st.write("No WARP violations detected.🥳")
-                st.write(
-                    "Don't get too excited though, we'd need more choices to fully check whether your preferences are rational."
+                    if report["garp"]:
+                        st.markdown(
+                            r"""However, your choices still form a cycle.<br>
+                        Such a cycle can't come from a rational preference, so GARP is violated.""",
+                            unsafe_allow_html=True,
+                        )
+                        show_paginated(report["garp"], show_cycle, key="garp_page")
+                    else:
+                        st.write(
+                            "Don't get too excited though, we'd need more choices to fully check whether your preferences are rational."
+                        )
+
+                stats = cache.stats()
+                st.caption(
+                    f"Check cache: {stats['hits']} hits, {stats['misses']} misses, "
+                    f"{stats['entries']} histories stored."
                 )
 
         # Refresh only works if it's outside/independent of WARP button, otherwise it will only refresh WARP
         if st.button("Click to Restart", type="primary"):
+            # stop a check nobody else is waiting for
+            if "check_job" in st.session_state:
+                check_jobs().release(st.session_state.check_job)
+                running = False
             # If button pressed, trigger JS to refresh page
             st.write(
                 '<meta http-equiv="refresh" content="1">',
                 unsafe_allow_html=True,
             )
 
+        # poll the running check
+        if running:
+            utl.profile_panel()
+            time.sleep(0.25)
+            st.rerun()
+
 _, c2, _ = utl.wide_col()
 
 with c2:
@@ -308,6 +390,12 @@ with c2:
         unsafe_allow_html=True,
     )
 
+    st.markdown(
+        r"""Update: the checker now compares all pairs at once with matrix operations, and also checks GARP,
+        which catches longer cycles like $x \succ y \succ z \succ x$ that WARP misses.""",
+        unsafe_allow_html=True,
+    )
+
 
 ### THEORY ###
 _, c3, _ = utl.wide_col()
@@ -357,3 +445,5 @@ with c5:
     )
 
     st.write("Work in progress - check back soon.")
+
+utl.profile_panel()
@@ -0,0 +1,94 @@
+import plotly.express as px
+import src.choice as chc
+import src.scripts.plot_themes as thm
+import src.scripts.utils as utl
+import streamlit as st
+
+### PAGE CONFIGS ###
+utl.micro_page_config()
+utl.bundled_css("pages")
+
+
+@st.cache_resource
+def cohort_rollup():
+    # one rollup shared by all sessions, next to the choice log
+    return chc.CohortRollup("data/choices.sqlite")
+
+
+# create one column with consistent width
+_, col_top, _ = utl.wide_col()
+
+### PAGE INTRO ###
+
+with col_top:
+    st.title("Cohort Analytics")
+    st.header("How consistent are the fruit choices of all players?")
+    st.write(
+        "Every confirmed choice in the fruit game is logged. Below are the WARP and GARP violation rates of all sessions so far."
+    )
+
+# only the sessions logged since the last refresh are processed
+rollup = cohort_rollup()
+with utl.timed("cohort refresh"):
+    rollup.refresh()
+    days = rollup.by_day()
+
+### START OF CONTENT ###
+_, c1, _ = utl.wide_col()
+
+with c1:
+    if days.empty:
+        st.write("No choices have been logged yet - play the fruit game first!")
+        utl.profile_panel()
+        st.stop()
+
+    sessions = days["sessions"].sum()
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Sessions", f"{sessions:,}")
+    m2.metric("Violate WARP", f"{days['warp'].sum() / sessions:.1%}")
+    m3.metric("Violate GARP", f"{days['garp'].sum() / sessions:.1%}")
+
+    st.markdown(
+        "<h3 style='text-align: left'> 1. Violations over time</h3>",
+        unsafe_allow_html=True,
+    )
+    fig = px.line(
+        days,
+        x="day",
+        y=["warp_rate", "garp_rate"],
+        template=thm.template("my_streamlit"),
+        labels={"value": "Share of sessions", "variable": ""},
+    )
+    fig.update_traces(hovertemplate="%{x}<br>%{y:.1%}<extra></extra>")
+    fig.update_yaxes(tickformat=".0%")
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.markdown(
+        "<h3 style='text-align: left'> 2. Most common violating menus</h3>",
+        unsafe_allow_html=True,
+    )
+    st.write(
+        "A menu takes part in a violation if it offered a pair of fruits that the player ranked both ways, and one of them was chosen."
+    )
+    menus = rollup.top_menus(10)
+    menus["menu"] = menus["menu"].map(", ".join)
+    st.dataframe(
+        menus,
+        hide_index=True,
+        column_config={"rate": st.column_config.NumberColumn(format="%.2f")},
+    )
+
+    st.markdown(
+        "<h3 style='text-align: left'> 3. Violations by pair of fruits</h3>",
+        unsafe_allow_html=True,
+    )
+    st.write(
+        "A pair is testable in a session if both fruits were chosen at least once from menus offering both."
+    )
+    st.dataframe(
+        rollup.by_pair(),
+        hide_index=True,
+        column_config={"rate": st.column_config.NumberColumn(format="%.2f")},
+    )
+
+utl.profile_panel()
@@ -0,0 +1,43 @@
+"""
+Choice consistency checks (WARP, GARP, SARP) without a Streamlit dependency.
+
+The checks only need NumPy, so they can run in batch jobs as well as from
+the Streamlit pages. Other dependencies are only needed by some features:
+
+- SciPy: the exact Houtman-Maks index, the RUM distance and Afriat numbers.
+- PyArrow: Parquet and Arrow IPC import and export, and checks of files.
+- pandas: the cohort analytics of the choice log (CohortRollup).
+"""
+
+from .adaptive import AdaptiveScheduler
+from .arrow import (
+    from_arrow,
+    iter_datasets,
+    read_feather,
+    read_parquet,
+    to_arrow,
+    write_feather,
+    write_parquet,
+)
+from .afriat import ccei, check_garp_e
+from .batch import check
+from .bundles import generate_bundles
+from .cohort import CohortRollup
+from .dataset import ChoiceDataset
+from .garp import (
+    find_garp_violations,
+    find_sarp_violations,
+    iter_garp_violations,
+    iter_sarp_violations,
+)
+from .houtman_maks import houtman_maks
+from .incremental import WarpIndex
+from .jobs import JobPool
+from .log import ChoiceLog
+from .memo import CheckCache, history_key
+from .power import bronars_power
+from .render import generate_html_table
+from .rum import choice_frequencies, rum_check
+from .scheduler import BundleScheduler
+from .utility import afriat_numbers, menu_utilities, menu_utility
+from .warp import check_warp_pairwise, find_warp_violations, iter_warp_violations
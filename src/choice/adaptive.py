@@ -0,0 +1,146 @@
+"""
+Adaptive menu selection that reaches a consistency verdict in fewer rounds.
+
+The revealed preference relation R is kept transitively closed as one Python
+int bitset per item, next to the direct strict preferences P0 (x chosen, y
+rejected from the same menu). Choices violate GARP exactly when some x P0 y
+has y R x, whichever answer added the edges of that cycle. Choosing x alone from a menu M violates GARP exactly when
+some other y in M is already revealed preferred to x (y R x), so the share of
+such "risky" answers scores how hard a menu tests the choices so far. Each
+round shows the menu from a pool of unseen ones that best combines that risk
+with the number of new pairs of items a consistent answer would compare.
+
+The verdict is decided, and no more menus are needed, when
+- a GARP violation (which includes every WARP violation) has been found, or
+- the choices so far predict the answer to every pooled menu, and these
+  predictions have passed `retests` further menus that could have exposed a
+  violation, or
+- no unseen menu is left.
+"""
+
+from .scheduler import BundleScheduler
+
+
+class AdaptiveScheduler:
+    """Picks the next menu to expose or rule out a violation as fast as possible."""
+
+    def __init__(self, items, sizes=(3,), seed=None, retests=1, pool_size=64):
+        self.items = list(items)
+        self.index = {item: j for j, item in enumerate(self.items)}
+        self.retests = retests
+        self.pool_size = pool_size
+
+        # unseen menus come from the lazy scheduler, a pool at a time
+        self._unseen = BundleScheduler(self.items, sizes, seed)
+        self.pool = []
+
+        # reach[x] has bit y set if x R y
+        self.reach = [0] * len(self.items)
+        # strict[x] has bit y set if x P0 y
+        self.strict = [0] * len(self.items)
+        self.rounds = 0
+        self.retests_passed = 0
+        self.violation = None
+
+    def __len__(self):
+        """Maximum number of menus, if the verdict is never decided early."""
+        return len(self._unseen)
+
+    @property
+    def verdict(self):
+        """'inconsistent', 'consistent', or None while undecided."""
+        if self.violation is not None:
+            return "inconsistent"
+        if self.settled and self.retests_passed >= self.retests:
+            return "consistent"
+        if not self.pool:
+            return "consistent"
+        return None
+
+    @property
+    def settled(self):
+        """Whether a consistent answer to any pooled menu would reveal nothing new.
+
+        The pool is a random sample of the unseen menus (all of them, once few
+        are left), so a settled pool means the choices so far predict the
+        remaining answers.
+        """
+        self._refill()
+        return all(self.information(bundle) == 0 for bundle in self.pool)
+
+    def _refill(self):
+        while len(self.pool) < self.pool_size and self._unseen.remaining:
+            self.pool.append(next(self._unseen))
+
+    def risk(self, bundle):
+        """Share of single-item answers from the bundle that would violate GARP."""
+        ids = [self.index[item] for item in bundle]
+        risky = sum(any(self.reach[y] >> x & 1 for y in ids if y != x) for x in ids)
+        return risky / len(ids)
+
+    def information(self, bundle):
+        """Expected number of new pairs compared by a consistent answer.
+
+        A consistent chooser picks one of the items nothing else in the bundle
+        is revealed preferred to; each such pick compares it to every item it
+        has not been compared to yet.
+        """
+        ids = [self.index[item] for item in bundle]
+        safe = [x for x in ids if not any(self.reach[y] >> x & 1 for y in ids)]
+        new = [
+            sum(not (self.reach[x] >> y & 1 or self.reach[y] >> x & 1) for y in ids) - 1
+            for x in safe
+        ]
+        return sum(new) / len(new) if new else 0
+
+    def next_bundle(self):
+        """The next menu to show, or None once the verdict is decided."""
+        if self.verdict is not None:
+            return None
+
+        # risky menus test the choices so far, informative ones extend them
+        return max(
+            self.pool,
+            key=lambda b: self.risk(b) + self.information(b) / (len(b) - 1),
+        )
+
+    def record(self, bundle, choice):
+        """Record the choice from a shown menu and update the verdict."""
+        if bundle in self.pool:
+            self.pool.remove(bundle)
+        self.rounds += 1
+
+        was_settled = self.settled
+        could_violate = self.risk(bundle) > 0
+
+        ids = [self.index[item] for item in bundle]
+        chosen = [self.index[item] for item in choice if item in bundle]
+
+        for x in chosen:
+            for y in ids:
+                if y != x:
+                    self._add_edge(x, y)
+                if y not in chosen:
+                    self.strict[x] |= 1 << y
+
+        # GARP: x P0 y, from this menu or an earlier one, but y R x
+        if self.violation is None:
+            self.violation = self._find_violation()
+
+        if was_settled and could_violate and self.violation is None:
+            self.retests_passed += 1
+
+    def _find_violation(self):
+        for x, strict in enumerate(self.strict):
+            for y in range(len(self.items)):
+                if strict >> y & 1 and self.reach[y] >> x & 1:
+                    return (self.items[x], self.items[y])
+        return None
+
+    def _add_edge(self, x, y):
+        # everyone who reaches x (and x itself) now reaches y and all y reaches
+        new = (1 << y) | self.reach[y]
+        bit = 1 << x
+        for u, reach in enumerate(self.reach):
+            if u == x or reach & bit:
+                self.reach[u] = reach | new
@@ -0,0 +1,119 @@
+"""
+Afriat's critical cost efficiency index (CCEI) for price and quantity data.
+
+Observation t is a bundle x_t bought at prices p_t. With efficiency e <= 1,
+x_t is directly revealed preferred to x_s (x_t R0_e x_s) if
+e * p_t.x_t >= p_t.x_s, and strictly (x_t P0_e x_s) if the inequality is
+strict. GARP_e: if x_t R_e x_s, then not x_s P0_e x_t.
+
+GARP_1 is GARP itself, and the CCEI is the largest e for which GARP_e holds,
+i.e. the share of the budget a household could have wasted on the way to
+its choices.
+
+Every relation only changes at one of the ratios r[t, s] = p_t.x_s / p_t.x_t,
+so the CCEI is found by binary search over the sorted ratios of each
+household, with all households of a chunk tested in the same vectorized step.
+"""
+
+import numpy as np
+
+from . import graph
+from .parallel import map_chunks
+
+
+def expenditure_ratios(prices, quantities):
+    """Return r[..., t, s] = p_t.x_s / p_t.x_t for (..., T, G) arrays."""
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    spent = np.einsum("...tg,...sg->...ts", prices, quantities)
+    own = np.diagonal(spent, axis1=-2, axis2=-1)
+    return spent / own[..., None]
+
+
+def check_garp_e(prices, quantities, e=1.0):
+    """Whether GARP_e holds, for one household or a batch of them.
+
+    prices and quantities are (T, G) arrays of T observations of G goods, or
+    (H, T, G) arrays for H households; e is a scalar or one value per
+    household. Returns a bool, or a bool array of shape (H,).
+    """
+    ratios = expenditure_ratios(prices, quantities)
+    holds = _garp_e(ratios.reshape(-1, *ratios.shape[-2:]), e)
+    return holds.reshape(ratios.shape[:-2])[()]
+
+
+def ccei(prices, quantities, chunk_size=2_000, processes=None):
+    """Critical cost efficiency index of one household or a batch of them.
+
+    prices and quantities are (T, G) arrays, or (H, T, G) arrays for H
+    households. Households are split into chunks of chunk_size, checked on
+    processes worker processes (see parallel.map_chunks). Returns a float,
+    or a float array of shape (H,).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    shape = prices.shape[:-2]
+    prices = prices.reshape(-1, *prices.shape[-2:])
+    quantities = quantities.reshape(-1, *quantities.shape[-2:])
+
+    chunks = [
+        (prices[i : i + chunk_size], quantities[i : i + chunk_size])
+        for i in range(0, len(prices), chunk_size)
+    ]
+    results = map_chunks(_ccei_chunk, chunks, processes)
+    return np.concatenate(results or [np.empty(0)]).reshape(shape)[()]
+
+
+def _ccei_chunk(prices, quantities):
+    """Binary search for the CCEI of every household in a chunk."""
+    ratios = expenditure_ratios(prices, quantities)
+    n_households, n = ratios.shape[:2]
+
+    # candidate values below 1, sorted per household, padded with inf
+    off_diagonal = ~np.eye(n, dtype=bool)
+    candidates = np.where(ratios < 1, ratios, np.inf)[:, off_diagonal]
+    candidates.sort(axis=1)
+    n_candidates = np.isfinite(candidates).sum(axis=1)
+
+    # index of the smallest candidate c such that GARP_e fails for all e > c
+    lo = np.zeros(n_households, dtype=np.int64)
+    hi = n_candidates.copy()
+    while True:
+        active = np.flatnonzero(lo < hi)
+        if not len(active):
+            break
+        mid = (lo[active] + hi[active]) // 2
+        c = candidates[active, mid]
+
+        # just above c, R0_e and P0_e both hold exactly where r <= c
+        edges = (ratios[active] <= c[:, None, None]) & off_diagonal
+        fails = _has_cycle(edges)
+        hi[active[fails]] = mid[fails]
+        lo[active[~fails]] = mid[~fails] + 1
+
+    # no candidate below 1 fails: GARP_e holds for every e < 1
+    index = np.ones(n_households)
+    found = lo < n_candidates
+    index[found] = candidates[found, lo[found]]
+    return index
+
+
+def _garp_e(ratios, e):
+    """GARP_e of every household in a batch of expenditure ratios."""
+    e = np.broadcast_to(np.asarray(e, dtype=np.float64), ratios.shape[:1])
+    weak = ratios <= e[:, None, None]
+    strict = ratios < e[:, None, None]
+
+    closure = graph.batch_transitive_closure(graph.pack_rows(weak))
+    closure = graph.unpack_rows(closure, ratios.shape[-1])
+
+    # x_t R x_s while x_s P0 x_t
+    return ~(closure & strict.transpose(0, 2, 1)).any(axis=(1, 2))
+
+
+def _has_cycle(edges):
+    """Whether each relation in a batch of (n, n) boolean matrices has a cycle."""
+    closure = graph.batch_transitive_closure(graph.pack_rows(edges))
+    items = np.arange(edges.shape[-1])
+    word, mask = graph.bit_masks(items)
+    return ((closure[:, items, word] & mask) != 0).any(axis=1)
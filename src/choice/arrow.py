@@ -0,0 +1,231 @@
+"""
+Arrow and Parquet import and export of choice data.
+
+A dataset is stored as a table with one row per bundle: the subject, and the
+bundle and the choice as list columns of items. In Arrow the items are
+dictionary-encoded, with the item list as dictionary, so the bundle column
+is built directly from the CSR arrays of a ChoiceDataset, and reading it
+back takes its offsets and item indices as NumPy views of the Arrow
+buffers. Parquet files hold plain list<string> columns (dictionary-encoded
+on disk), which Arrow encodes again in bulk when they are read, as it does
+for files written by other tools. No item is decoded in Python.
+
+Large files are read in record batches, each turned into a ChoiceDataset of
+whole subjects, so batch checks run over files larger than memory. Arrow
+IPC (Feather) files are memory-mapped. CSV files are streamed as well, with
+the items of a bundle or choice in one field, separated by sep.
+
+PyArrow is imported by the functions that need it, so the rest of the
+package only needs NumPy.
+"""
+
+import numpy as np
+
+from . import encoding as enc
+from .dataset import ChoiceDataset
+
+COLUMNS = ("subject", "bundle", "choice")
+
+
+def to_arrow(dataset, dictionary=True):
+    """Arrow table of a ChoiceDataset, one row per bundle.
+
+    Items are dictionary-encoded, or plain strings if dictionary is False.
+    """
+    import pyarrow as pa
+
+    items = pa.array(dataset.items.tolist(), type=pa.string())
+    _, menu_ids, chosen_ptr, chosen_ids = dataset.csr()
+
+    def list_column(offsets, ids):
+        values = pa.DictionaryArray.from_arrays(ids.astype(np.int32), items)
+        if not dictionary:
+            values = values.dictionary_decode()
+        return pa.LargeListArray.from_arrays(np.asarray(offsets, np.int64), values)
+
+    subjects = np.repeat(dataset.subjects, np.diff(dataset.subject_offsets))
+    return pa.table(
+        {
+            "subject": pa.array(subjects),
+            "bundle": list_column(dataset.offsets, menu_ids),
+            "choice": list_column(chosen_ptr, chosen_ids),
+        }
+    )
+
+
+def from_arrow(table, items=None):
+    """ChoiceDataset of an Arrow table or record batch, one row per bundle.
+
+    Rows of a subject must be contiguous. Without a subject column all rows
+    are one subject. items fixes the item order, otherwise items are
+    ordered as in the dictionary of the bundle column.
+    """
+    import pyarrow as pa
+
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    table = table.unify_dictionaries()
+
+    menu_ptr, menu_values = _list_column(table.column("bundle"))
+    chosen_ptr, chosen_values = _list_column(table.column("choice"))
+    if items is None:
+        items = menu_values.dictionary.to_pylist()
+    index = {item: j for j, item in enumerate(items)}
+    menu_ids = _item_ids(menu_values, items, index)
+    chosen_ids = _item_ids(chosen_values, items, index)
+    if (menu_ids < 0).any():
+        raise ValueError("Some bundles contain items that are not in items.")
+
+    # flag the shown items that were chosen from the same bundle
+    n_rows, n = len(table), len(items)
+    rows = np.repeat(np.arange(n_rows), np.diff(menu_ptr))
+    chosen_rows = np.repeat(np.arange(n_rows), np.diff(chosen_ptr))
+    known = chosen_ids >= 0
+    chosen = np.isin(rows * n + menu_ids, chosen_rows[known] * n + chosen_ids[known])
+
+    if "subject" in table.column_names:
+        subjects, subject_offsets = enc.runs(
+            table.column("subject").to_numpy(zero_copy_only=False)
+        )
+    else:
+        subjects, subject_offsets = [0], [0, n_rows]
+    return ChoiceDataset(items, menu_ptr, menu_ids, chosen, subjects, subject_offsets)
+
+
+def write_parquet(dataset, where, row_group_size=1_000_000, compression="zstd"):
+    """Write a ChoiceDataset to a Parquet file path or writable file object."""
+    import pyarrow.parquet as pq
+
+    # Parquet dictionary-encodes the strings on disk, but PyArrow cannot read
+    # dictionary columns nested in lists back
+    pq.write_table(
+        to_arrow(dataset, dictionary=False),
+        where,
+        row_group_size=row_group_size,
+        compression=compression,
+    )
+
+
+def read_parquet(source, items=None):
+    """Read a whole Parquet file into a ChoiceDataset."""
+    import pyarrow.parquet as pq
+
+    file = pq.ParquetFile(source)
+    return from_arrow(file.read(columns=_columns(file)), items)
+
+
+def write_feather(dataset, where, chunk_size=1_000_000):
+    """Write a ChoiceDataset to an uncompressed Arrow IPC (Feather) file."""
+    import pyarrow.feather as feather
+
+    feather.write_feather(
+        to_arrow(dataset), where, compression="uncompressed", chunksize=chunk_size
+    )
+
+
+def read_feather(source, items=None):
+    """Read an Arrow IPC (Feather) file into a ChoiceDataset, memory-mapped."""
+    import pyarrow.feather as feather
+
+    return from_arrow(feather.read_table(source, memory_map=True), items)
+
+
+def iter_datasets(source, batch_size=1_000_000, items=None, sep=";"):
+    """Stream a Parquet, Arrow IPC or CSV file as ChoiceDatasets of whole subjects.
+
+    Record batches of about batch_size bundles are read one at a time; the
+    rows of the last subject of a batch are carried over to the next one.
+    A file without a subject column is a single subject and is read whole.
+    """
+    import pyarrow as pa
+
+    carry = None
+    for batch in _iter_batches(source, batch_size, sep):
+        table = pa.Table.from_batches([batch])
+        if carry is not None:
+            table = pa.concat_tables([carry, table])
+        if "subject" not in table.column_names:
+            carry = table
+            continue
+
+        subjects = table.column("subject").to_numpy(zero_copy_only=False)
+        last = enc.runs(subjects)[1][-2]
+        if last > 0:
+            yield from_arrow(table.slice(0, last), items)
+        carry = table.slice(last)
+
+    if carry is not None and len(carry):
+        yield from_arrow(carry, items)
+
+
+def _iter_batches(source, batch_size, sep):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if str(source).endswith((".csv", ".csv.gz")):
+        yield from _iter_csv(source, batch_size, sep)
+    elif _is_parquet(source):
+        file = pq.ParquetFile(source)
+        yield from file.iter_batches(batch_size, columns=_columns(file))
+    else:
+        with pa.memory_map(str(source)) as mapped:
+            reader = pa.ipc.open_file(mapped)
+            for i in range(reader.num_record_batches):
+                yield reader.get_batch(i)
+
+
+def _iter_csv(source, batch_size, sep):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as csv
+
+    # CSV blocks are sized in bytes, assume about 64 bytes per row
+    reader = csv.open_csv(
+        source,
+        read_options=csv.ReadOptions(block_size=batch_size * 64),
+        convert_options=csv.ConvertOptions(
+            column_types={c: pa.string() for c in COLUMNS},
+            include_columns=list(COLUMNS),
+            include_missing_columns=True,
+        ),
+    )
+    for batch in reader:
+        columns = {c: batch.column(c) for c in batch.schema.names}
+        if columns["subject"].null_count == len(batch):
+            del columns["subject"]
+        for c in ("bundle", "choice"):
+            columns[c] = pc.split_pattern(columns[c].fill_null(""), sep)
+        yield pa.RecordBatch.from_pydict(columns)
+
+
+def _is_parquet(source):
+    with open(source, "rb") as f:
+        return f.read(4) == b"PAR1"
+
+
+def _columns(file):
+    return [c for c in COLUMNS if c in file.schema_arrow.names]
+
+
+def _list_column(column):
+    """Offsets (from 0) and dictionary-encoded values of a list column."""
+    import pyarrow.compute as pc
+
+    column = column.combine_chunks()
+    offsets = column.offsets.to_numpy().astype(np.int64, copy=False)
+    values = column.values.slice(offsets[0], offsets[-1] - offsets[0])
+    if not hasattr(values, "dictionary"):
+        values = pc.dictionary_encode(values)
+    if offsets[0]:
+        offsets = offsets - offsets[0]
+    return offsets, values
+
+
+def _item_ids(values, items, index):
+    """Item indices of dictionary-encoded values, -1 for unknown items."""
+    ids = values.indices.to_numpy()
+    dictionary = values.dictionary.to_pylist()
+    if dictionary == list(items):
+        return ids
+    lookup = np.array([index.get(item, -1) for item in dictionary], dtype=np.int64)
+    return lookup[ids]
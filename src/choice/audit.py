@@ -0,0 +1,140 @@
+"""
+Command-line auditor of WARP, GARP and SARP for large choice panels.
+
+    python -m src.choice.audit choices.parquet -o results.csv --processes 8
+
+Reads a Parquet, Arrow IPC or CSV file with one row per bundle (subject,
+bundle and choice columns, rows of a subject contiguous), streams it in
+chunks of whole subjects and checks the chunks on a process pool with the
+batch checks, whose WARP counts agree with check_warp_pairwise. Results are
+written as CSV as soon as each chunk is checked, in input order, and at most
+a few chunks per process are in flight, so memory stays bounded however
+large the input is. Throughput is reported on stderr.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import deque
+from multiprocessing import Pool
+
+from .arrow import iter_datasets
+from .batch import check
+
+FIELDS = [
+    "subject",
+    "warp_violations",
+    "garp_violations",
+    "sarp_violations",
+    "consistent",
+]
+
+
+def audit(source, output, batch_size=100_000, processes=None, sep=";", log=None):
+    """Check every subject of source and write one CSV row per subject to output.
+
+    output is a writable text file. Chunks of about batch_size bundles are
+    checked on processes worker processes (all cores by default; 1 runs in
+    this process). Progress lines go to log, if given. Returns a dict with
+    the number of subjects, of inconsistent subjects and the seconds taken.
+    """
+    writer = csv.writer(output)
+    writer.writerow(FIELDS)
+    start = time.perf_counter()
+    totals = {"subjects": 0, "inconsistent": 0}
+
+    def write(rows):
+        writer.writerows(rows)
+        totals["subjects"] += len(rows)
+        totals["inconsistent"] += sum(not row[-1] for row in rows)
+        if log is not None:
+            elapsed = time.perf_counter() - start
+            print(
+                f"{totals['subjects']:,} subjects, "
+                f"{totals['subjects'] / elapsed:,.0f} subjects/s",
+                file=log,
+                flush=True,
+            )
+
+    chunks = iter_datasets(source, batch_size=batch_size, sep=sep)
+    processes = processes or os.cpu_count()
+    if processes == 1:
+        for chunk in chunks:
+            write(_check_chunk(chunk))
+    else:
+        with Pool(processes) as pool:
+            # a bounded window of chunks in flight, written back in order
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.apply_async(_check_chunk, (chunk,)))
+                if len(pending) >= 2 * processes:
+                    write(pending.popleft().get())
+            while pending:
+                write(pending.popleft().get())
+
+    totals["seconds"] = time.perf_counter() - start
+    return totals
+
+
+def _check_chunk(dataset):
+    results = check(dataset)
+    return [
+        [subject] + [result[field] for field in FIELDS[1:]]
+        for subject, result in results.items()
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.choice.audit",
+        description="Check WARP, GARP and SARP for every subject of a choice file.",
+    )
+    parser.add_argument(
+        "source", help="Parquet, Arrow IPC or CSV file, one row per bundle"
+    )
+    parser.add_argument(
+        "-o", "--output", help="CSV file for the results (default: stdout)"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100_000,
+        help="bundles per chunk sent to a worker (default: 100000)",
+    )
+    parser.add_argument(
+        "--processes", type=int, help="worker processes (default: all cores)"
+    )
+    parser.add_argument(
+        "--sep", default=";", help="separator of the items in a CSV field (default: ;)"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="no progress on stderr"
+    )
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        totals = audit(
+            args.source,
+            output,
+            batch_size=args.batch_size,
+            processes=args.processes,
+            sep=args.sep,
+            log=None if args.quiet else sys.stderr,
+        )
+    finally:
+        if args.output:
+            output.close()
+
+    print(
+        f"Checked {totals['subjects']:,} subjects in {totals['seconds']:.1f}s "
+        f"({totals['subjects'] / max(totals['seconds'], 1e-9):,.0f} subjects/s), "
+        f"{totals['inconsistent']:,} violate GARP.",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Batch consistency checks for many subjects at once.
+
+All subjects are encoded into one flat array of revealed preference edges
+over (subject, item) nodes, so WARP, GARP and SARP are decided for every
+subject with a few vectorized operations and a single pass of Tarjan's
+algorithm, instead of one Python loop per subject and pair of items.
+"""
+
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import encoding as enc
+from . import graph
+from . import warp as wrp
+from .dataset import ChoiceDataset
+
+
+def check(dataset, items=None, chunk_size=10_000):
+    """Check WARP, GARP and SARP for many subjects at once.
+
+    dataset is a ChoiceDataset, or maps each subject id to its (bundles,
+    choices) in the format of the shown_bundles and choices session state; a
+    plain list of such pairs is keyed by position. A path to a Parquet or
+    Arrow IPC file is streamed in record batches of whole subjects. Returns a
+    dict mapping each subject id to its number of violations (counted like
+    the find_*_violations functions) and whether it is consistent with a
+    rational preference (GARP holds).
+    """
+    if isinstance(dataset, (str, os.PathLike)):
+        from .arrow import iter_datasets
+
+        results = {}
+        for part in iter_datasets(dataset, items=items):
+            results.update(check(part, chunk_size=chunk_size))
+        return results
+
+    # chunks of subjects bound the memory of the flat edge arrays
+    if isinstance(dataset, ChoiceDataset):
+        subjects = dataset.subjects.tolist()
+        chunks = (
+            _check_dataset(dataset.subject_slice(start, start + chunk_size))
+            for start in range(0, len(subjects), chunk_size)
+        )
+    else:
+        if not isinstance(dataset, Mapping):
+            dataset = dict(enumerate(dataset))
+
+        subjects = list(dataset)
+        if items is None:
+            items = wrp.item_order(b for s in subjects for b in dataset[s][0])
+        index = {item: j for j, item in enumerate(items)}
+
+        chunks = (
+            _check_lists(
+                [dataset[s] for s in subjects[start : start + chunk_size]], index
+            )
+            for start in range(0, len(subjects), chunk_size)
+        )
+
+    counts = np.concatenate([c.T for c in chunks]) if subjects else []
+    return {
+        subject: {
+            "warp_violations": warp,
+            "garp_violations": garp,
+            "sarp_violations": sarp,
+            "consistent": garp == 0,
+        }
+        for subject, (warp, garp, sarp) in zip(subjects, np.asarray(counts).tolist())
+    }
+
+
+def _check_lists(data, index):
+    bundles = [b for bundles, _ in data for b in bundles]
+    choices = [c for _, choices in data for c in choices]
+    row_subject = np.repeat(np.arange(len(data)), [len(b) for b, _ in data])
+    csr = enc.encode_lists(bundles, choices, index)
+    return _check_csr(*csr, row_subject, len(index), len(data))
+
+
+def _check_dataset(dataset):
+    csr = dataset.csr()
+    return _check_csr(*csr, dataset.row_subjects(), dataset.n_items, dataset.n_subjects)
+
+
+def _check_csr(
+    menu_ptr, menu_ids, chosen_ptr, chosen_ids, row_subject, n_items, n_subjects
+):
+    n = n_subjects * n_items
+    x, y, weak, strict = enc.subject_pairs(
+        menu_ptr, menu_ids, chosen_ptr, chosen_ids, row_subject, n_items, n_subjects
+    )
+    weak_keys = np.unique(x[weak] * n + y[weak])
+    strict_keys = np.unique(x[strict] * n + y[strict])
+
+    # WARP: x R0 y and y P0 x, counted once per unordered pair
+    sy, sx = strict_keys // n, strict_keys % n
+    warp = np.isin(sx * n + sy, weak_keys)
+    warp_pairs = np.unique(np.minimum(sx, sy)[warp] * n + np.maximum(sx, sy)[warp])
+
+    # GARP and SARP: a closing edge inside a strongly connected component of R0
+    wx, wy = weak_keys // n, weak_keys % n
+    nodes, compact = np.unique(np.concatenate([wx, wy]), return_inverse=True)
+    edges = compact.reshape(2, -1).T
+    labels = graph.strongly_connected_components(edges, len(nodes))
+
+    garp = labels[np.searchsorted(nodes, sx)] == labels[np.searchsorted(nodes, sy)]
+    sarp = labels[edges[:, 0]] == labels[edges[:, 1]]
+
+    return np.stack(
+        [
+            np.bincount(warp_pairs // n // n_items, minlength=n_subjects),
+            np.bincount(sx[garp] // n_items, minlength=n_subjects),
+            np.bincount(wx[sarp] // n_items, minlength=n_subjects),
+        ]
+    )
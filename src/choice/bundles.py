@@ -0,0 +1,11 @@
+"""Menus ("bundles") shown in the choice game."""
+
+from itertools import combinations
+
+
+def generate_bundles(items, sizes=(3,)):
+    """Generate bundles of the given sizes from the given items."""
+    bundles = []
+    for i in sizes:
+        bundles.extend(combinations(items, i))
+    return bundles
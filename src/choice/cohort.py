@@ -0,0 +1,332 @@
+"""
+Cohort analytics over the sessions stored in the choice log.
+
+Every session contributes counts to a few rollups, keyed by kind:
+    "menu": bundles shown, and shown bundles in which a WARP-violating pair
+            of items was available and at least one of the two was chosen;
+    "pair": sessions in which the pair of items could reveal a WARP
+            violation, and sessions in which it did (as check_warp_pairwise
+            decides it);
+    "day":  sessions started that day, and sessions violating WARP and GARP.
+
+The rollups are materialized as tables next to the log, together with the id
+of the last processed event. A refresh only reads the events written since
+then: the sessions they belong to have their old contributions subtracted
+from the totals and are recomputed from all of their events, so sessions
+that are still running are counted correctly. The dashboard only reads the
+small totals table.
+
+pandas is imported by the functions that need it, so importing the package
+stays cheap for scripts and worker processes that never use the rollups.
+"""
+
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from . import encoding as enc
+from .batch import check
+from .dataset import ChoiceDataset
+from .log import SCHEMA as LOG_SCHEMA
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_state (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    last_event INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_sessions (
+    session TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    warp INTEGER NOT NULL,
+    garp INTEGER NOT NULL,
+    PRIMARY KEY (session, kind, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_totals (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    warp INTEGER NOT NULL,
+    garp INTEGER NOT NULL,
+    PRIMARY KEY (kind, key)
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO rollup_state VALUES (0, 0);
+"""
+
+UPSERT = (
+    "INSERT INTO rollup_totals VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (kind, key) DO UPDATE SET n = n + excluded.n, "
+    "warp = warp + excluded.warp, garp = garp + excluded.garp"
+)
+
+COLUMNS = ["session", "kind", "key", "n", "warp", "garp"]
+
+
+class CohortRollup:
+    """Incrementally maintained violation rollups of a ChoiceLog database."""
+
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(LOG_SCHEMA + SCHEMA)
+
+    def refresh(self, chunk_size=100_000):
+        """Fold the events logged since the last refresh into the rollups.
+
+        Sessions with new events are recomputed in chunks of chunk_size
+        sessions. Returns the number of sessions recomputed.
+        """
+        conn = self._connect()
+        try:
+            # take the write lock first, so concurrent refreshes never count twice
+            conn.execute("BEGIN IMMEDIATE")
+            (last_event,) = conn.execute(
+                "SELECT last_event FROM rollup_state"
+            ).fetchone()
+            (newest,) = conn.execute("SELECT MAX(id) FROM choices").fetchone()
+            if newest is None or newest <= last_event:
+                conn.execute("ROLLBACK")
+                return 0
+
+            sessions = [
+                s
+                for (s,) in conn.execute(
+                    "SELECT DISTINCT session FROM choices WHERE id > ? AND id <= ?",
+                    (last_event, newest),
+                )
+            ]
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS dirty (session TEXT)")
+            for start in range(0, len(sessions), chunk_size):
+                conn.execute("DELETE FROM dirty")
+                conn.executemany(
+                    "INSERT INTO dirty VALUES (?)",
+                    ((s,) for s in sessions[start : start + chunk_size]),
+                )
+                self._update(conn, newest)
+
+            conn.execute("UPDATE rollup_state SET last_event = ?", (newest,))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return len(sessions)
+
+    def by_day(self):
+        """Sessions per day (UTC) and the share violating WARP and GARP."""
+        totals = self._totals("day").rename(columns={"key": "day", "n": "sessions"})
+        totals["warp_rate"] = totals["warp"] / totals["sessions"]
+        totals["garp_rate"] = totals["garp"] / totals["sessions"]
+        return totals.sort_values("day", ignore_index=True)
+
+    def by_menu(self):
+        """Times each menu was shown and took part in a WARP violation."""
+        import pandas as pd
+
+        totals = self._totals("menu")
+        totals = pd.DataFrame(
+            {
+                "menu": [tuple(json.loads(key)) for key in totals["key"]],
+                "shown": totals["n"],
+                "violated": totals["warp"],
+                "rate": totals["warp"] / totals["n"],
+            }
+        )
+        return totals.sort_values(["rate", "shown"], ascending=False, ignore_index=True)
+
+    def by_pair(self):
+        """Sessions in which each pair of items was testable and violated WARP."""
+        import pandas as pd
+
+        totals = self._totals("pair")
+        pairs = [json.loads(key) for key in totals["key"]]
+        totals = pd.DataFrame(
+            {
+                "item_1": [x for x, _ in pairs],
+                "item_2": [y for _, y in pairs],
+                "testable": totals["n"],
+                "violated": totals["warp"],
+                "rate": totals["warp"] / totals["n"],
+            }
+        )
+        return totals.sort_values(
+            ["rate", "testable"], ascending=False, ignore_index=True
+        )
+
+    def top_menus(self, n=10):
+        """The n menus that most often took part in a WARP violation."""
+        menus = self.by_menu()
+        menus = menus[menus["violated"] > 0]
+        return menus.sort_values("violated", ascending=False, ignore_index=True).head(n)
+
+    def _totals(self, kind):
+        import pandas as pd
+
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT key, n, warp, garp FROM rollup_totals WHERE kind = ?",
+                conn,
+                params=(kind,),
+            )
+
+    def _update(self, conn, newest):
+        import pandas as pd
+
+        events = pd.read_sql_query(
+            "SELECT session, bundle, choice, created FROM choices "
+            "WHERE id <= ? AND session IN (SELECT session FROM dirty) "
+            "ORDER BY session, round, id",
+            conn,
+            params=(newest,),
+        )
+        old = pd.read_sql_query(
+            "SELECT * FROM rollup_sessions WHERE session IN (SELECT session FROM dirty)",
+            conn,
+        )
+        new = session_rollups(events)
+
+        conn.execute(
+            "DELETE FROM rollup_sessions WHERE session IN (SELECT session FROM dirty)"
+        )
+        conn.executemany(
+            "INSERT INTO rollup_sessions VALUES (?, ?, ?, ?, ?, ?)", _rows(new)
+        )
+
+        counts = ["n", "warp", "garp"]
+        old[counts] = -old[counts]
+        delta = (
+            pd.concat([new, old]).groupby(["kind", "key"], as_index=False)[counts].sum()
+        )
+        conn.executemany(UPSERT, _rows(delta))
+        conn.execute("DELETE FROM rollup_totals WHERE n = 0")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+
+def session_rollups(events):
+    """Rollup contributions of whole sessions, one row per (session, kind, key).
+
+    events is a DataFrame of logged choices (session, bundle and choice as
+    JSON lists, created as a Unix time) with the events of every session
+    contiguous and in the order they were shown.
+    """
+    import pandas as pd
+
+    if events.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    # few distinct menus and choices are logged, so each is parsed only once
+    bundles, menu_keys = _parse(events["bundle"])
+    choices, _ = _parse(events["choice"])
+    sessions, subject_offsets = enc.runs(events["session"].to_numpy())
+    row_subject = np.repeat(np.arange(len(sessions)), np.diff(subject_offsets))
+
+    # CSR menus over the items sorted by name, so x < y orders pairs by name
+    shown = bundles.explode().dropna()
+    menu_ids, items = pd.factorize(shown, sort=True)
+    menu_ptr = np.zeros(len(events) + 1, dtype=np.int64)
+    np.cumsum(bundles.map(len).to_numpy(), out=menu_ptr[1:])
+    n = len(items)
+
+    picked = choices.explode().dropna()
+    chosen_keys = picked.index.to_numpy() * n + items.get_indexer(picked)
+    chosen = np.isin(shown.index.to_numpy() * n + menu_ids, chosen_keys)
+
+    # consistency of every session, from the batch checks
+    dataset = ChoiceDataset(
+        items, menu_ptr, menu_ids, chosen, sessions, subject_offsets
+    )
+    counts = check(dataset)
+    warp = np.array([counts[s]["warp_violations"] for s in sessions]) > 0
+    garp = np.array([counts[s]["garp_violations"] for s in sessions]) > 0
+
+    # every pair x < y shown together, with whether x and y were chosen
+    rows, x, y = enc.row_pairs(menu_ptr, menu_ids, menu_ptr, menu_ids)
+    keep = x < y
+    rows, x, y = rows[keep], x[keep], y[keep]
+    cx = np.isin(rows * n + x, chosen_keys)
+    cy = np.isin(rows * n + y, chosen_keys)
+
+    pair_keys, inverse = np.unique(
+        (row_subject[rows] * n + x) * n + y, return_inverse=True
+    )
+
+    def any_row(flags):
+        return np.bincount(inverse, flags, minlength=len(pair_keys)) > 0
+
+    x_chosen, y_chosen = any_row(cx), any_row(cy)
+    testable = x_chosen & y_chosen
+    violated = (x_chosen & any_row(cy & ~cx)) | (y_chosen & any_row(cx & ~cy))
+
+    # keys of the distinct pairs only, then gathered for every session
+    pair_ids, pair_codes = np.unique(pair_keys[testable] % (n * n), return_inverse=True)
+    pair_names = np.array(
+        [json.dumps([items[i // n], items[i % n]]) for i in pair_ids], dtype=object
+    )
+    pairs = pd.DataFrame(
+        {
+            "session": sessions[pair_keys[testable] // n // n],
+            "kind": "pair",
+            "key": pair_names[pair_codes],
+            "n": 1,
+            "warp": violated[testable].astype(int),
+            "garp": 0,
+        }
+    )
+
+    # a bundle takes part in a violation if it compared a violating pair
+    involved = np.zeros(len(events), dtype=int)
+    involved[np.unique(rows[violated[inverse] & (cx | cy)])] = 1
+    menus = (
+        pd.DataFrame(
+            {
+                "session": events["session"].to_numpy(),
+                "kind": "menu",
+                "key": menu_keys,
+                "n": 1,
+                "warp": involved,
+                "garp": 0,
+            }
+        )
+        .groupby(["session", "kind", "key"], as_index=False)[["n", "warp", "garp"]]
+        .sum()
+    )
+
+    started = events["created"].to_numpy()[subject_offsets[:-1]]
+    days = pd.DataFrame(
+        {
+            "session": sessions,
+            "kind": "day",
+            "key": pd.to_datetime(started, unit="s").strftime("%Y-%m-%d"),
+            "n": 1,
+            "warp": warp.astype(int),
+            "garp": garp.astype(int),
+        }
+    )
+    return pd.concat([pairs, menus, days], ignore_index=True)[COLUMNS]
+
+
+def _parse(column):
+    """Parsed JSON lists of a column, and their sorted JSON as canonical keys."""
+    import pandas as pd
+
+    codes, distinct = pd.factorize(column)
+    lists = pd.Series([json.loads(value) for value in distinct], dtype=object)
+    keys = np.array([json.dumps(sorted(values)) for values in lists], dtype=object)
+    return lists.take(codes).reset_index(drop=True), keys[codes]
+
+
+def _rows(frame):
+    # sqlite3 only binds Python scalars, not NumPy ones
+    return frame.astype(object).itertuples(index=False, name=None)
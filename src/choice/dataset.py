@@ -0,0 +1,223 @@
+"""
+Compact array-backed storage of menus and choices.
+
+Bundles are stored in CSR layout: bundle i shows the items
+item_ids[offsets[i]:offsets[i + 1]], in the order they were shown, and the
+chosen column flags which of those entries were chosen. Subjects are
+contiguous runs of bundles delimited by subject_offsets.
+
+A saved dataset is a directory of .npy files, which are opened memory-mapped,
+so multi-GB choice panels load without parsing.
+"""
+
+import os
+from collections.abc import Mapping, Sequence
+from itertools import islice
+
+import numpy as np
+
+from . import garp as grp
+from . import warp as wrp
+
+ARRAYS = ("items", "subjects", "subject_offsets", "offsets", "item_ids", "chosen")
+
+
+class ChoiceDataset:
+    """Menus and choices of one or more subjects in CSR layout.
+
+    Converts losslessly to and from the shown_bundles / choices lists of the
+    choice page, as long as every choice is a subset of its bundle.
+    """
+
+    def __init__(
+        self, items, offsets, item_ids, chosen, subjects=None, subject_offsets=None
+    ):
+        self.items = np.asarray(items)
+        self.offsets = np.asarray(offsets)
+        self.item_ids = np.asarray(item_ids)
+        self.chosen = np.asarray(chosen)
+
+        if subject_offsets is None:
+            subject_offsets = [0, len(self.offsets) - 1]
+            subjects = [0]
+        self.subjects = np.asarray(subjects)
+        self.subject_offsets = np.asarray(subject_offsets)
+
+    @classmethod
+    def from_lists(cls, bundles, choices, items=None):
+        """Build a single subject dataset from lists of bundles and choices."""
+        return cls.from_subjects({0: (bundles, choices)}, items)
+
+    @classmethod
+    def from_subjects(cls, subjects, items=None):
+        """Build a dataset from a mapping of subject id to (bundles, choices)."""
+        if not isinstance(subjects, Mapping):
+            subjects = dict(enumerate(subjects))
+
+        bundles = [b for s in subjects for b in subjects[s][0]]
+        choices = [c for s in subjects for c in subjects[s][1]]
+        items = wrp.item_order(bundles, items)
+        index = {item: j for j, item in enumerate(items)}
+
+        offsets = np.zeros(len(bundles) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in bundles], out=offsets[1:])
+        subject_offsets = np.zeros(len(subjects) + 1, dtype=np.int64)
+        np.cumsum([len(subjects[s][0]) for s in subjects], out=subject_offsets[1:])
+
+        item_ids = np.fromiter(
+            (index[i] for b in bundles for i in b), dtype=np.int32, count=offsets[-1]
+        )
+        chosen = np.fromiter(
+            (i in c for b, c in zip(bundles, choices) for i in b),
+            dtype=bool,
+            count=offsets[-1],
+        )
+        return cls(items, offsets, item_ids, chosen, list(subjects), subject_offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def n_items(self):
+        return len(self.items)
+
+    @property
+    def n_subjects(self):
+        return len(self.subjects)
+
+    def bundle(self, i):
+        """Bundle i as a tuple of items, in the order it was shown."""
+        ids = self.item_ids[self.offsets[i] : self.offsets[i + 1]]
+        return tuple(self.items[ids].tolist())
+
+    def choice(self, i):
+        """Choice from bundle i as a set of items."""
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        ids = self.item_ids[start:stop][self.chosen[start:stop]]
+        return set(self.items[ids].tolist())
+
+    @property
+    def bundles(self):
+        """Lazy sequence of bundles, decoded on access."""
+        return _Column(self.bundle, len(self))
+
+    @property
+    def choices(self):
+        """Lazy sequence of choices, decoded on access."""
+        return _Column(self.choice, len(self))
+
+    def to_lists(self):
+        """Return (bundles, choices) lists in the session state format."""
+        return list(self.bundles), list(self.choices)
+
+    def to_subjects(self):
+        """Return a dict of subject id to (bundles, choices) lists."""
+        return {
+            subject: self.subject_slice(s, s + 1).to_lists()
+            for s, subject in enumerate(self.subjects.tolist())
+        }
+
+    def subject_slice(self, start, stop):
+        """Dataset of subjects start to stop, sharing (memory-mapped) arrays."""
+        stop = min(stop, self.n_subjects)
+        first, last = self.subject_offsets[start], self.subject_offsets[stop]
+        offsets = self.offsets[first : last + 1]
+        return ChoiceDataset(
+            self.items,
+            offsets - offsets[0],
+            self.item_ids[offsets[0] : offsets[-1]],
+            self.chosen[offsets[0] : offsets[-1]],
+            self.subjects[start:stop],
+            self.subject_offsets[start : stop + 1] - first,
+        )
+
+    def row_subjects(self):
+        """Subject position of every bundle."""
+        return np.repeat(np.arange(self.n_subjects), np.diff(self.subject_offsets))
+
+    def csr(self):
+        """Return (menu_ptr, menu_ids, chosen_ptr, chosen_ids) CSR arrays."""
+        menu_ids = np.asarray(self.item_ids, dtype=np.int64)
+        rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        chosen_ptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(rows[self.chosen], minlength=len(self)), out=chosen_ptr[1:]
+        )
+        return self.offsets, menu_ids, chosen_ptr, menu_ids[self.chosen]
+
+    def to_matrices(self):
+        """Return boolean bundle x item matrices of shown and chosen items."""
+        rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        menus = np.zeros((len(self), self.n_items), dtype=bool)
+        chosen = np.zeros((len(self), self.n_items), dtype=bool)
+        menus[rows, self.item_ids] = True
+        chosen[rows[self.chosen], self.item_ids[self.chosen]] = True
+        return menus, chosen
+
+    def to_bitmasks(self):
+        """Return uint64 bitmasks of shown and chosen items, one per bundle.
+
+        Bit j is item j, so this only works for up to 64 items.
+        """
+        if self.n_items > 64:
+            raise ValueError("Bitmasks need at most 64 items.")
+        rows = np.repeat(np.arange(len(self)), np.diff(self.offsets))
+        bits = np.left_shift(np.uint64(1), self.item_ids.astype(np.uint64))
+        menus = np.zeros(len(self), dtype=np.uint64)
+        chosen = np.zeros(len(self), dtype=np.uint64)
+        np.bitwise_or.at(menus, rows, bits)
+        np.bitwise_or.at(chosen, rows[self.chosen], bits[self.chosen])
+        return menus, chosen
+
+    def find_warp_violations(self, limit=None):
+        """WARP violations of all bundles, pooled across subjects."""
+        menus, chosen = self.to_matrices()
+        items = self.items.tolist()
+        violations = wrp.warp_violations(
+            self.bundles, self.choices, items, menus, chosen
+        )
+        return list(islice(violations, limit))
+
+    def find_garp_violations(self, limit=None):
+        """GARP violations of all bundles, pooled across subjects."""
+        weak, strict = grp.csr_relations(*self.csr(), self.n_items)
+        items = self.items.tolist()
+        violations = grp.cycle_violations(
+            self.bundles, self.choices, items, weak, strict, "GARP"
+        )
+        return list(islice(violations, limit))
+
+    def save(self, path):
+        """Save the dataset as a directory of .npy files."""
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Load a saved dataset, memory-mapped by default."""
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        return cls(**arrays)
+
+
+class _Column(Sequence):
+    """Read-only sequence that decodes rows of a dataset on access."""
+
+    def __init__(self, getter, length):
+        self._getter = getter
+        self._length = length
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._getter(j) for j in range(*i.indices(self._length))]
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("ChoiceDataset index out of range")
+        return self._getter(i)
@@ -0,0 +1,78 @@
+"""
+Flat (CSR) encodings of menus and choices.
+
+A list of bundles is stored as one array of item indices plus an offsets
+array, so bundle i is ids[ptr[i]:ptr[i + 1]].
+"""
+
+import numpy as np
+
+
+def flatten(lists):
+    """Offsets and concatenated values of a list of lists (CSR layout)."""
+    ptr = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(values) for values in lists], out=ptr[1:])
+    ids = np.fromiter(
+        (value for values in lists for value in values), dtype=np.int64, count=ptr[-1]
+    )
+    return ptr, ids
+
+
+def runs(values):
+    """Values of the contiguous runs of an array, and the offsets of the runs."""
+    change = np.ones(len(values), dtype=bool)
+    change[1:] = values[1:] != values[:-1]
+    starts = np.flatnonzero(change)
+    return values[starts], np.r_[starts, len(values)]
+
+
+def encode_lists(bundles, choices, index):
+    """CSR menus and choices of a subject, given an item -> index mapping.
+
+    Choices outside of the shown bundle are ignored.
+    """
+    menu_ptr, menu_ids = flatten([[index[i] for i in b] for b in bundles])
+    chosen_ptr, chosen_ids = flatten(
+        [[index[i] for i in c if i in b] for b, c in zip(bundles, choices)]
+    )
+    return menu_ptr, menu_ids, chosen_ptr, chosen_ids
+
+
+def row_pairs(left_ptr, left_ids, right_ptr, right_ids):
+    """All (row, x, y) with x in the left row and y in the right row."""
+    n_rows = len(left_ptr) - 1
+    left_rows = np.repeat(np.arange(n_rows), np.diff(left_ptr))
+    reps = np.diff(right_ptr)[left_rows]
+
+    pos = np.repeat(np.arange(len(left_ids)), reps)
+    offsets = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    rows = left_rows[pos]
+    return rows, left_ids[pos], right_ids[right_ptr[rows] + offsets]
+
+
+def revealed_pairs(menu_ptr, menu_ids, chosen_ptr, chosen_ids, n):
+    """Direct revealed preference pairs of CSR menus and choices over n items.
+
+    Returns (rows, x, y, weak, strict): x was chosen from bundle rows[k] while y
+    was available; weak marks x != y and strict marks that y was not chosen.
+    """
+    rows, x, y = row_pairs(chosen_ptr, chosen_ids, menu_ptr, menu_ids)
+    chosen_rows = np.repeat(np.arange(len(chosen_ptr) - 1), np.diff(chosen_ptr))
+    strict = ~np.isin(rows * n + y, chosen_rows * n + chosen_ids)
+    return rows, x, y, x != y, strict
+
+
+def subject_pairs(
+    menu_ptr, menu_ids, chosen_ptr, chosen_ids, row_subject, n_items, n_subjects
+):
+    """Revealed preference pairs of many subjects over (subject, item) nodes.
+
+    Bundle i belongs to subject row_subject[i], and item j of subject s is
+    node s * n_items + j. Returns (x, y, weak, strict) as revealed_pairs.
+    """
+    menu_ids = menu_ids + np.repeat(row_subject, np.diff(menu_ptr)) * n_items
+    chosen_ids = chosen_ids + np.repeat(row_subject, np.diff(chosen_ptr)) * n_items
+    _, x, y, weak, strict = revealed_pairs(
+        menu_ptr, menu_ids, chosen_ptr, chosen_ids, n_subjects * n_items
+    )
+    return x, y, weak, strict
@@ -0,0 +1,124 @@
+"""
+GARP and SARP checkers for menu choice data.
+
+x is directly revealed preferred to y (x R0 y) if x was chosen from a bundle
+where y was available, and strictly (x P0 y) if y was available but not chosen.
+R is the transitive closure of R0.
+
+GARP: if x R y, then not y P0 x.
+SARP: if x R y and x != y, then not y R0 x, i.e. no cycles and no indifference.
+
+WARP violations are the GARP violations with a cycle of length two; GARP also
+catches longer intransitive cycles like x > y > z > x.
+"""
+
+from itertools import islice
+
+import numpy as np
+
+from . import encoding as enc
+from . import graph
+from . import warp as wrp
+
+
+def revealed_preference(bundles, choices, items=None):
+    """Return items and the direct weak and strict revealed preference relations.
+
+    Each relation is a pair (edges, rows): an (E, 2) array of item indices
+    (x, y), sorted, and for every edge the first bundle where x was chosen
+    while y was available (and, for the strict relation, not chosen).
+    """
+    items = wrp.item_order(bundles, items)
+    index = {item: j for j, item in enumerate(items)}
+    n = len(items)
+
+    weak, strict = csr_relations(*enc.encode_lists(bundles, choices, index), n)
+    return items, weak, strict
+
+
+def csr_relations(menu_ptr, menu_ids, chosen_ptr, chosen_ids, n):
+    """Direct weak and strict relations of CSR menus and choices over n items."""
+    rows, x, y, weak, strict = enc.revealed_pairs(
+        menu_ptr, menu_ids, chosen_ptr, chosen_ids, n
+    )
+    return _unique_edges(rows, x, y, weak, n), _unique_edges(rows, x, y, strict, n)
+
+
+def find_garp_violations(bundles, choices, items=None, limit=None):
+    """Find all GARP violations, up to limit, each with a shortest cycle.
+
+    A violation is a strict edge y P0 x closing a weak path x R ... R y.
+    """
+    return list(iter_garp_violations(bundles, choices, items, limit))
+
+
+def iter_garp_violations(bundles, choices, items=None, limit=None):
+    """Yield GARP violations as their shortest cycles are found, up to limit."""
+    items, weak, strict = revealed_preference(bundles, choices, items)
+    violations = cycle_violations(bundles, choices, items, weak, strict, "GARP")
+    yield from islice(violations, limit)
+
+
+def find_sarp_violations(bundles, choices, items=None, limit=None):
+    """Find all SARP violations, up to limit, each with a shortest cycle.
+
+    A violation is a weak edge y R0 x closing a weak path x R ... R y.
+    """
+    return list(iter_sarp_violations(bundles, choices, items, limit))
+
+
+def iter_sarp_violations(bundles, choices, items=None, limit=None):
+    """Yield SARP violations as their shortest cycles are found, up to limit."""
+    items, weak, _ = revealed_preference(bundles, choices, items)
+    violations = cycle_violations(bundles, choices, items, weak, weak, "SARP")
+    yield from islice(violations, limit)
+
+
+def cycle_violations(bundles, choices, items, weak, closing, axiom):
+    """Yield closing edges y -> x of a path x R ... R y, with shortest cycles.
+
+    Cycles are searched one source item x at a time, so the first violations
+    come out before the rest are computed.
+
+    Witnesses are looked up by index in bundles and choices, which can be any
+    sequences, e.g. the lazy columns of a ChoiceDataset.
+    """
+    n = len(items)
+    edges, rows = weak
+    labels = graph.strongly_connected_components(edges, n)
+    closure = graph.transitive_closure(edges, n, labels)
+    indptr, indices = graph.adjacency_lists(edges, n)
+    keys = edges[:, 0] * n + edges[:, 1]
+
+    # closing edge (y, x) violates the axiom if x R y
+    closing_edges, closing_rows = closing
+    ys, xs = closing_edges[:, 0], closing_edges[:, 1]
+    violating = graph.has_bits(closure, xs, ys)
+
+    for x in np.unique(xs[violating]):
+        group = np.flatnonzero(violating & (xs == x))
+        # every cycle through x stays inside the component of x
+        paths = graph.shortest_paths(
+            indptr, indices, x, ys[group], allowed=labels == labels[x]
+        )
+
+        for e, path in zip(group, paths):
+            # path x -> ... -> y along R0, closed by the edge y -> x
+            path_keys = np.asarray(path[:-1]) * n + np.asarray(path[1:])
+            witness_rows = rows[np.searchsorted(keys, path_keys)].tolist()
+            witness_rows.append(closing_rows[e])
+            yield {
+                "condition": True,
+                "reason": f"{axiom} violation detected!",
+                "item_1": items[x],
+                "item_2": items[ys[e]],
+                "cycle": [items[i] for i in path + [x]],
+                "witnesses": [[bundles[r], choices[r]] for r in witness_rows],
+            }
+
+
+def _unique_edges(rows, x, y, keep, n):
+    """Deduplicate edges, keeping the first row where each one appears."""
+    keys, first = np.unique((x * n + y)[keep], return_index=True)
+    edges = np.column_stack([keys // n, keys % n])
+    return edges, rows[keep][first]
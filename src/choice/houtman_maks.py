@@ -0,0 +1,181 @@
+"""
+Houtman-Maks index: the largest subset of observations consistent with GARP.
+
+Observations are linked in a graph where i -> j if an item chosen from
+bundle j was available in bundle i, so that a chain of revealed preferences
+x R0 y R0 z ... walks along a path of observations. The edge is strict if
+that item was available but not chosen in bundle i. A subset of observations
+satisfies GARP exactly when no strongly connected component of its graph
+contains a strict edge, so the index is the number of observations left
+after removing the fewest ones that break every such "violating" cycle.
+
+That is a feedback vertex set problem, which is NP-hard. It is solved as a
+hitting set problem over violating cycles, generated lazily: each round
+packs disjoint shortest violating cycles inside every violating component of
+the observations kept so far, then removes the fewest observations that hit
+every cycle found. Observations outside violating components never enter
+the problem, and rounds stop once the kept observations satisfy GARP.
+
+The exact hitting set is an integer program solved by SciPy's MILP solver
+(HiGHS); the greedy one repeatedly removes the observation on most cycles.
+"""
+
+import numpy as np
+
+from . import graph
+from . import warp as wrp
+
+
+def houtman_maks(bundles, choices, items=None, exact=True):
+    """Largest subset of observations that satisfies GARP.
+
+    Observations are the (bundle, choice) pairs in the format the choice page
+    produces. With exact=False the hitting sets are found greedily, which
+    can keep fewer observations than possible but scales to large inputs.
+    Returns a dict with the size of the subset, the positions of the
+    removed observations and whether the size is exact.
+    """
+    weak, strict = observation_graph(bundles, choices, items)
+    removed = remove_violations(weak, strict, min_cover if exact else greedy_cover)
+    return {
+        "size": len(weak) - len(removed),
+        "removed": removed.tolist(),
+        "exact": exact,
+    }
+
+
+def remove_violations(weak, strict, cover):
+    """Sorted observations to remove so that the rest satisfy GARP.
+
+    cover(cycles, n) returns the observations to remove to hit every cycle.
+    """
+    n = len(weak)
+    cycles = []
+    removed = np.empty(0, dtype=np.int64)
+    while True:
+        kept = np.setdiff1d(np.arange(n), removed)
+        found = [
+            cycle
+            for component in violating_components(weak, strict, kept)
+            for cycle in disjoint_cycles(weak, strict, component)
+        ]
+        if not found:
+            return removed
+        cycles += found
+        removed = np.unique(cover(cycles, n)).astype(np.int64)
+
+
+def observation_graph(bundles, choices, items=None):
+    """Return the weak and strict observation x observation edge matrices.
+
+    weak[i, j]: an item chosen from bundle j was available in bundle i.
+    strict[i, j]: such an item was available but not chosen in bundle i.
+    """
+    _, menus, chosen = wrp.encode_choices(bundles, choices, items)
+    c = chosen.astype(np.float32)
+    m = menus.astype(np.float32)
+    rejected = (menus & ~chosen).astype(np.float32)
+
+    weak = (m @ c.T) > 0
+    strict = (rejected @ c.T) > 0
+    np.fill_diagonal(weak, False)
+    return weak, strict
+
+
+def violating_components(weak, strict, nodes):
+    """Strongly connected components of the nodes that contain a strict edge."""
+    sub = weak[np.ix_(nodes, nodes)]
+    labels = graph.strongly_connected_components(np.argwhere(sub), len(nodes))
+
+    strict_edges = np.argwhere(strict[np.ix_(nodes, nodes)])
+    inside = labels[strict_edges[:, 0]] == labels[strict_edges[:, 1]]
+    bad = np.unique(labels[strict_edges[inside, 0]])
+    return [nodes[labels == label] for label in bad.tolist()]
+
+
+def shortest_violating_cycle(weak, strict, nodes):
+    """Observations on a shortest cycle through a strict edge, or None."""
+    sub = weak[np.ix_(nodes, nodes)]
+    strict_edges = np.argwhere(strict[np.ix_(nodes, nodes)])
+    if not len(strict_edges):
+        return None
+
+    # a strict edge i -> j is closed by a shortest path j -> ... -> i
+    i, j = strict_edges[:, 0], strict_edges[:, 1]
+    lengths = path_lengths(sub)[j, i]
+    closed = np.flatnonzero(lengths >= 0)
+    if not len(closed):
+        return None
+    e = closed[np.argmin(lengths[closed])]
+
+    indptr, indices = graph.adjacency_lists(np.argwhere(sub), len(nodes))
+    path = graph.shortest_paths(indptr, indices, j[e], [i[e]])[0]
+    return nodes[path]
+
+
+def path_lengths(adjacency):
+    """All-pairs shortest path lengths of a dense graph, -1 if unreachable.
+
+    Breadth-first search from every node at once, one boolean matrix product
+    per level.
+    """
+    n = len(adjacency)
+    step = adjacency.astype(np.float32)
+    lengths = np.full((n, n), -1, dtype=np.int64)
+    reached = np.eye(n, dtype=bool)
+    frontier = reached.copy()
+    length = 0
+    while frontier.any():
+        lengths[frontier] = length
+        frontier = ((frontier.astype(np.float32) @ step) > 0) & ~reached
+        reached |= frontier
+        length += 1
+    return lengths
+
+
+def disjoint_cycles(weak, strict, nodes):
+    """Vertex-disjoint violating cycles, found shortest first."""
+    cycles = []
+    while True:
+        cycle = shortest_violating_cycle(weak, strict, nodes)
+        if cycle is None:
+            return cycles
+        cycles.append(cycle)
+        nodes = np.setdiff1d(nodes, cycle)
+
+
+def min_cover(cycles, n):
+    """Fewest observations that hit every cycle, as an integer program.
+
+    Raises RuntimeError if the solver stops without an optimal cover.
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import csr_matrix
+
+    rows = np.repeat(np.arange(len(cycles)), [len(cycle) for cycle in cycles])
+    hits = csr_matrix(
+        (np.ones(len(rows)), (rows, np.concatenate(cycles))), shape=(len(cycles), n)
+    )
+    result = milp(
+        np.ones(n),
+        constraints=LinearConstraint(hits, lb=1),
+        integrality=np.ones(n),
+        bounds=Bounds(0, 1),
+    )
+    if not result.success:
+        raise RuntimeError(
+            f"The hitting set MILP failed ({result.message}); "
+            "use exact=False for the greedy Houtman-Maks index."
+        )
+    return np.flatnonzero(result.x > 0.5)
+
+
+def greedy_cover(cycles, n):
+    """Observations that hit every cycle, taking the one on most cycles first."""
+    removed = []
+    while cycles:
+        counts = np.bincount(np.concatenate(cycles), minlength=n)
+        node = np.argmax(counts)
+        removed.append(node)
+        cycles = [cycle for cycle in cycles if node not in cycle]
+    return removed
@@ -0,0 +1,77 @@
+"""
+Incremental WARP tracking, updated as each choice is confirmed.
+
+Adding a bundle only touches the pairs of items in that bundle, so keeping
+every WARP violation up to date costs O(|bundle|^2) per choice instead of a
+full recheck of the history.
+"""
+
+from itertools import islice
+
+
+class WarpIndex:
+    """Revealed preference pairs and WARP violations of a growing history."""
+
+    def __init__(self):
+        self.n_bundles = 0
+        # (x, y) -> first bundle where x was chosen while y was available
+        self.weak = {}
+        # (x, y) -> first bundle where x was chosen while y was not chosen
+        self.strict = {}
+        # {x, y} -> (item_1, item_2, bundle A, bundle B), in order of detection
+        self.found = {}
+        # bundles A and B of every violation
+        self.rows = set()
+
+    def add(self, bundle, choice):
+        """Record the choice from a bundle and update the violations."""
+        row = self.n_bundles
+        self.n_bundles += 1
+
+        for x in choice:
+            if x not in bundle:
+                continue
+            for y in bundle:
+                if y == x:
+                    continue
+                if (x, y) not in self.weak:
+                    self.weak[(x, y)] = row
+                    # x chosen over y here, y chosen over x before
+                    if (y, x) in self.strict:
+                        self._found(x, y, row, self.strict[(y, x)])
+                if y not in choice and (x, y) not in self.strict:
+                    self.strict[(x, y)] = row
+                    # y chosen with x available before, x chosen over y here
+                    if (y, x) in self.weak:
+                        self._found(y, x, self.weak[(y, x)], row)
+
+    def _found(self, item_1, item_2, chosen, not_chosen):
+        pair = frozenset((item_1, item_2))
+        if pair not in self.found:
+            self.found[pair] = (item_1, item_2, chosen, not_chosen)
+            self.rows.update((chosen, not_chosen))
+
+    def __len__(self):
+        return len(self.found)
+
+    @property
+    def consistent(self):
+        return not self.found
+
+    def violations(self, bundles, choices, limit=None):
+        """WARP violations in the format of find_warp_violations, up to limit.
+
+        bundles and choices are the lists the index was built from.
+        """
+        found = islice(self.found.values(), limit)
+        return [
+            {
+                "condition": True,
+                "reason": "WARP violation detected!",
+                "item_1": item_1,
+                "item_2": item_2,
+                "chosen": [bundles[a], choices[a]],
+                "not_chosen": [bundles[b], choices[b]],
+            }
+            for item_1, item_2, a, b in found
+        ]
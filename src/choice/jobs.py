@@ -0,0 +1,115 @@
+"""
+Background jobs for checks that take too long to run in a script rerun.
+
+A JobPool runs jobs on a shared thread pool and returns a Job handle right
+away; the page keeps the handle in session state and polls its progress and
+partial results on each rerun. Jobs are keyed (e.g. by history_key()), so a
+job submitted while an identical one is still running joins it instead of
+running twice. Threads suffice since the heavy lifting happens in NumPy and
+SciPy, which release the GIL, and the checks that use processes spread
+their work over a process pool themselves.
+
+A job function is called as fn(job, *args, **kwargs). It reports progress
+with job.report() and calls job.check_cancelled() between steps, so a job
+whose last user released it stops at the next step.
+"""
+
+import os
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor, wait
+
+
+class Job:
+    """Handle of a submitted job: progress, partial results and the result."""
+
+    def __init__(self, key):
+        self.key = key
+        self.progress = 0.0
+        self.message = ""
+        self.partial = None
+        self.users = 1
+        self.future = None
+        self._cancel = threading.Event()
+
+    def report(self, progress=None, message=None, partial=None):
+        """Update the progress (0 to 1), the status message or partial results."""
+        if progress is not None:
+            self.progress = min(max(progress, 0.0), 1.0)
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Raise CancelledError once the job has been cancelled."""
+        if self._cancel.is_set():
+            raise CancelledError(f"Job {self.key} was cancelled.")
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        """Wait up to timeout seconds for the job, and return whether it is done."""
+        wait([self.future], timeout)
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+
+class JobPool:
+    """Shared thread pool running keyed jobs, one running job per key."""
+
+    def __init__(self, max_workers=None):
+        self._executor = ThreadPoolExecutor(
+            max_workers or os.cpu_count(), thread_name_prefix="choice-job"
+        )
+        # key -> running job, dropped once the job finishes
+        self._jobs = {}
+        # reentrant, as a done callback may run inside submit
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Run fn(job, *args, **kwargs) in the background, or join a running job."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.cancelled:
+                job.users += 1
+                return job
+
+            job = Job(key)
+            self._jobs[key] = job
+            job.future = self._executor.submit(fn, job, *args, **kwargs)
+            job.future.add_done_callback(lambda _: self._forget(job))
+            return job
+
+    def release(self, job):
+        """Drop one user of a job, and cancel it once nobody is waiting for it."""
+        with self._lock:
+            job.users -= 1
+            if job.users > 0 or job.done():
+                return
+            job._cancel.set()
+            job.future.cancel()
+            self._forget(job)
+
+    def shutdown(self, wait=True):
+        """Cancel the running jobs and stop the threads."""
+        with self._lock:
+            for job in list(self._jobs.values()):
+                job._cancel.set()
+                job.future.cancel()
+            self._jobs.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _forget(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
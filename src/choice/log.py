@@ -0,0 +1,150 @@
+"""
+Persistent log of confirmed choices, shared by all sessions of the app.
+
+Events are appended to a SQLite database in WAL mode, so readers never block
+the writer and committed batches survive a crash of the app. append() only
+puts the event on a queue; a background thread writes queued events in
+batches of up to batch_size, waiting at most flush_interval seconds for a
+batch to fill, so a script rerun never waits for the disk.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS choices (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    bundle TEXT NOT NULL,
+    choice TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS choices_session ON choices (session, round);
+"""
+
+INSERT = (
+    "INSERT INTO choices (session, round, bundle, choice, created) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+class ChoiceLog:
+    """Append-only choice log with batched writes from a background thread."""
+
+    def __init__(self, path, batch_size=500, flush_interval=0.5):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_batches, name="choice-log-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    def append(self, session, round, bundle, choice):
+        """Queue one confirmed choice from a bundle, without waiting for the disk."""
+        if self._closed:
+            raise ValueError("The choice log is closed.")
+        event = (
+            session,
+            round,
+            json.dumps(list(bundle)),
+            json.dumps([item for item in bundle if item in choice]),
+            time.time(),
+        )
+        self._queue.put(event)
+
+    def flush(self):
+        """Wait until every queued choice has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Write the queued choices and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
+    def read(self, session=None):
+        """Logged choices as dicts, in the order they were written."""
+        query = "SELECT session, round, bundle, choice, created FROM choices"
+        params = ()
+        if session is not None:
+            query += " WHERE session = ?"
+            params = (session,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id", params).fetchall()
+        return [
+            {
+                "session": session,
+                "round": round,
+                "bundle": tuple(json.loads(bundle)),
+                "choice": set(json.loads(choice)),
+                "created": created,
+            }
+            for session, round, bundle, choice, created in rows
+        ]
+
+    def subjects(self):
+        """Map each session to its (bundles, choices), as the batch check takes."""
+        subjects = {}
+        for event in sorted(self.read(), key=lambda e: (e["session"], e["round"])):
+            bundles, choices = subjects.setdefault(event["session"], ([], []))
+            bundles.append(event["bundle"])
+            choices.append(event["choice"])
+        return subjects
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_batches(self):
+        conn = self._connect()
+        stop = False
+        while not stop:
+            # block for the first event, then gather a batch for a short while
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            events = [event for event in batch if event is not None]
+            try:
+                if events:
+                    with conn:
+                        conn.executemany(INSERT, events)
+            except sqlite3.Error:
+                logger.exception(
+                    "Could not write %d choices to %s", len(events), self.path
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
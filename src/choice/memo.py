@@ -0,0 +1,94 @@
+"""
+Results of consistency checks shared by all sessions, keyed by history.
+
+Menus and choices take few distinct values in the fruit game, so many
+sessions end with identical histories. history_key() hashes a canonical
+form of a history, and CheckCache keeps the results of the most recently
+used keys, evicting the least recently used once an entry or memory cap is
+reached. All methods are thread-safe, as the sessions of a Streamlit app
+run in threads of one process.
+"""
+
+import hashlib
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+
+def history_key(bundles, choices, *extra):
+    """Hex digest of bundles (in order), choices (as sets) and extra values."""
+    canonical = [
+        [list(bundle), sorted(choice, key=str)]
+        for bundle, choice in zip(bundles, choices)
+    ]
+    data = json.dumps([canonical, extra], default=str, separators=(",", ":"))
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class CheckCache:
+    """Thread-safe LRU cache of check results with hit and miss counters."""
+
+    def __init__(self, max_entries=10_000, max_bytes=64 * 2**20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        # key -> (result, size in bytes), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get_or_compute(self, key, compute):
+        """Cached result of key, or compute() stored under key.
+
+        Results are shared between callers, so they must not be modified.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self.misses += 1
+
+        # compute outside the lock, so other keys are served meanwhile
+        result = compute()
+        self.put(key, result)
+        return result
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used ones over the caps."""
+        # the pickled size stands in for the memory held by the result
+        size = len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                self.nbytes -= self._entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Hits, misses, hit rate, entries and bytes held."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+            }
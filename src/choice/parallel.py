@@ -0,0 +1,19 @@
+"""
+Process pool helper for the checks that split their work into chunks.
+"""
+
+import os
+from multiprocessing import Pool
+
+
+def map_chunks(fn, chunks, processes=None):
+    """Return [fn(*chunk) for chunk in chunks], computed on a process pool.
+
+    processes is the number of worker processes, all cores by default. With
+    1 process, or a single chunk, everything runs in this process.
+    """
+    processes = processes or os.cpu_count()
+    if processes == 1 or len(chunks) <= 1:
+        return [fn(*chunk) for chunk in chunks]
+    with Pool(min(processes, len(chunks))) as pool:
+        return pool.starmap(fn, chunks)
@@ -0,0 +1,101 @@
+"""
+Bronars power of a menu design: how often a random chooser fails.
+
+A design passes a subject only meaningfully if random choices would often
+fail it. The power is the share of uniformly random choice profiles over the
+design's bundles that violate WARP (or GARP), estimated by Monte Carlo.
+
+Profiles are drawn as a draws x bundles x items boolean array and checked in
+batch: the revealed preference relations of all draws are two batched matrix
+products, and GARP closes them with the bit-parallel batch closure. Draws are
+split into chunks seeded from one SeedSequence, so the estimate only depends
+on the seed, not on how the chunks are spread over processes.
+"""
+
+import numpy as np
+
+from . import graph
+from . import warp as wrp
+from .parallel import map_chunks
+
+# Memory for the temporaries of one chunk of draws, in each worker process
+CHUNK_BYTES = 64 * 2**20
+
+
+def bronars_power(
+    bundles,
+    draws=1_000_000,
+    axiom="WARP",
+    multiple=False,
+    seed=None,
+    chunk_size=None,
+    processes=None,
+):
+    """Estimate the share of random choice profiles that violate the axiom.
+
+    Each random chooser picks one item uniformly from every bundle, or a
+    uniformly random non-empty subset if multiple is True. Draws are made
+    in chunks of chunk_size on processes worker processes (see
+    parallel.map_chunks); by default chunks are as large as fits in
+    CHUNK_BYTES. Returns a dict with the power, the number of draws and the
+    standard error of the estimate.
+    """
+    if axiom not in ("WARP", "GARP"):
+        raise ValueError("axiom must be 'WARP' or 'GARP'.")
+
+    _, menus, _ = wrp.encode_choices(bundles, [set()] * len(bundles))
+    if chunk_size is None:
+        # about 12 bytes per draw, menu and item (the draws, and float32
+        # copies of them and of the rejected items), plus the relations
+        per_draw = 12 * menus.size + 4 * menus.shape[1] ** 2
+        chunk_size = max(1, CHUNK_BYTES // max(per_draw, 1))
+    sizes = [chunk_size] * (draws // chunk_size)
+    if draws % chunk_size:
+        sizes.append(draws % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    chunks = [(menus, size, axiom, multiple, s) for size, s in zip(sizes, seeds)]
+
+    counts = map_chunks(_count_violations, chunks, processes)
+    power = sum(counts) / draws if draws else 0.0
+    return {
+        "power": power,
+        "draws": draws,
+        "std_error": np.sqrt(power * (1 - power) / draws) if draws else 0.0,
+    }
+
+
+def random_choices(menus, draws, rng, multiple=False):
+    """Draw random choices from every menu, as a draws x menus x items array."""
+    chosen = np.zeros((draws, *menus.shape), dtype=bool)
+    for i, row in enumerate(menus):
+        ids = np.flatnonzero(row)
+        if multiple:
+            # a uniform non-empty subset is a uniform non-zero bitmask
+            masks = rng.integers(1, 2 ** len(ids), size=draws)
+            chosen[:, i, ids] = (masks[:, None] >> np.arange(len(ids))) & 1
+        else:
+            chosen[np.arange(draws), i, ids[rng.integers(len(ids), size=draws)]] = True
+    return chosen
+
+
+def violates(menus, chosen, axiom="WARP"):
+    """Whether each profile in a draws x menus x items array violates the axiom."""
+    c = chosen.astype(np.float32)
+    m = menus.astype(np.float32)
+    rejected = (menus & ~chosen).astype(np.float32)
+
+    # weak[d, x, y]: x chosen while y available, strict: y also not chosen
+    weak = (c.transpose(0, 2, 1) @ m) > 0
+    strict = (c.transpose(0, 2, 1) @ rejected) > 0
+
+    if axiom == "GARP":
+        closure = graph.batch_transitive_closure(graph.pack_rows(weak))
+        weak = graph.unpack_rows(closure, menus.shape[1])
+
+    return (weak & strict.transpose(0, 2, 1)).any(axis=(1, 2))
+
+
+def _count_violations(menus, draws, axiom, multiple, seed):
+    rng = np.random.default_rng(seed)
+    chosen = random_choices(menus, draws, rng, multiple)
+    return int(violates(menus, chosen, axiom).sum())
@@ -0,0 +1,42 @@
+"""HTML rendering of choice histories, without a Streamlit dependency."""
+
+from html import escape
+
+ROW = "<tr{}><td>{}</td><td>{}</td></tr>"
+VIOLATION = ' class="violation"'
+
+
+def generate_html_table(bundles, choices, start=0, stop=None, highlight=()):
+    """Generate an HTML table from lists of bundles and choices.
+
+    Only rows start to stop are rendered, so a page of a long history costs
+    the same as a short history. Rows in highlight (e.g. the violating rows
+    of a WarpIndex) get the "violation" class.
+    """
+    stop = len(bundles) if stop is None else min(stop, len(bundles))
+    rows = (
+        ROW.format(
+            VIOLATION if i in highlight else "",
+            _format(bundles[i]),
+            _format(choices[i]),
+        )
+        for i in range(start, stop)
+    )
+    return "".join(
+        [
+            '<table border="1">',
+            "<thead><tr><th>Bundles</th><th>Choices</th></tr></thead><tbody>",
+            *rows,
+            "</tbody></table>",
+        ]
+    )
+
+
+def _format(items):
+    """Items as printed by Python, without quotes: (a, b), [a, b] or {a, b}."""
+    joined = escape(", ".join(map(str, items)))
+    if isinstance(items, (set, frozenset)):
+        return f"{{{joined}}}"
+    if isinstance(items, list):
+        return f"[{joined}]"
+    return f"({joined},)" if len(items) == 1 else f"({joined})"
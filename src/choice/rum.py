@@ -0,0 +1,308 @@
+"""
+Random utility model (RUM) test for stochastic choice frequencies.
+
+Choice probabilities over n items are stored as an (n, 2^n) array p, where
+p[x, A] is the probability that x is chosen from the menu with bitmask A (bit
+j set if item j is in the menu), and 0 if x is not in A.
+
+The Block-Marschak polynomials are the superset Mobius inversion of p,
+    q(x, A) = sum over B containing A of (-1)^|B \\ A| p(x, B),
+and p is a RUM exactly when all of them are non-negative (Falmagne). Under
+a RUM, q(x, A) is the probability that the items outside A are exactly the
+ones ranked above x, so the q's form a unit flow down the lattice of menus.
+The fast Mobius transform takes one vectorized step per item, O(2^n * n)
+per item, instead of summing over the supersets of every menu.
+
+The distance to the nearest RUM is the largest total variation distance,
+across menus, between the observed choice frequencies and those of a RUM.
+"""
+
+from collections import defaultdict
+from itertools import chain
+
+import numpy as np
+
+from . import warp as wrp
+
+
+def rum_check(frequencies, items=None, limit=None, exact_limit=8):
+    """Test choice frequencies for consistency with a random utility model.
+
+    frequencies maps each menu (a tuple of items) to a mapping of item to
+    how often it was chosen, e.g. {("Apple", "Mango"): {"Apple": 7, "Mango": 3}}.
+    frequencies can also be an (n, 2^n) probability array p as returned by
+    choice_probabilities, with items naming its rows (0, ..., n - 1 by
+    default); menus with no probability at all count as not observed.
+    The Block-Marschak test needs every menu of two or more items; with
+    fewer menus, or when it fails, the distance to the nearest RUM is
+    computed exactly by linear programming for up to exact_limit items, and
+    bounded from above beyond that.
+
+    Returns a dict with the verdict, the negative Block-Marschak polynomials
+    (most negative first, up to limit), the distance and whether it is exact.
+    """
+    if isinstance(frequencies, np.ndarray):
+        p = np.asarray(frequencies, dtype=np.float64)
+        items = list(range(len(p)) if items is None else items)
+        if p.shape != (len(items), 1 << len(items)):
+            raise ValueError("p must have shape (n, 2^n) for n items.")
+        observed = p.any(axis=0)
+        observed[1 << np.arange(len(items))] = True
+    else:
+        items, p, observed = choice_probabilities(frequencies, items)
+    n = len(items)
+    lattice = _lattice(n)
+    complete = observed[lattice[1] >= 2].all()
+
+    if not complete and n > exact_limit:
+        raise ValueError(
+            "The Block-Marschak test needs frequencies for every menu of two "
+            f"or more items, and exact distances are limited to {exact_limit} items."
+        )
+
+    violations = []
+    if complete:
+        q = block_marschak(p, lattice)
+        x, menus = np.nonzero(q < -1e-12)
+        order = np.argsort(q[x, menus], kind="stable")[:limit]
+        violations = [
+            {
+                "item": items[x[k]],
+                "menu": tuple(items[j] for j in range(n) if menus[k] >> j & 1),
+                "block_marschak": float(q[x[k], menus[k]]),
+            }
+            for k in order.tolist()
+        ]
+        if not len(x):
+            return {
+                "consistent": True,
+                "violations": [],
+                "distance": 0.0,
+                "exact": True,
+            }
+
+    if n <= exact_limit:
+        distance, exact = nearest_rum_distance(p, observed, lattice), True
+    else:
+        flow = repaired_rum(q, lattice)
+        distance, exact = _max_variation(p, flow, observed, lattice), False
+
+    return {
+        "consistent": distance <= 1e-9,
+        "violations": violations,
+        "distance": distance,
+        "exact": exact,
+    }
+
+
+def choice_frequencies(subjects):
+    """Aggregate the choices of many subjects into menu frequencies.
+
+    subjects maps subject id to (bundles, choices) lists as on the choice
+    page; a choice of several items counts as an equal share for each.
+    """
+    frequencies = defaultdict(lambda: defaultdict(float))
+    for bundles, choices in subjects.values():
+        for bundle, choice in zip(bundles, choices):
+            chosen = [item for item in bundle if item in choice]
+            for item in chosen:
+                frequencies[tuple(sorted(bundle))][item] += 1 / len(chosen)
+    return {menu: dict(counts) for menu, counts in frequencies.items()}
+
+
+def choice_probabilities(frequencies, items=None):
+    """Return items, the (n, 2^n) probability array and the observed menus.
+
+    Singleton menus are always observed, as the only item is chosen for sure.
+    """
+    items = wrp.item_order(frequencies, items)
+    index = {item: j for j, item in enumerate(items)}
+    n = len(items)
+
+    # flat arrays of the items of every menu and of every count, read from
+    # the dicts without a Python loop per item
+    menus = list(frequencies)
+    counts = list(frequencies.values())
+    menu_rows = np.repeat(np.arange(len(menus)), [len(menu) for menu in menus])
+    menu_ids = _indices(index, chain.from_iterable(menus))
+    masks = np.bincount(menu_rows, 1 << menu_ids, minlength=len(menus))
+    masks = masks.astype(np.int64)
+
+    rows = np.repeat(np.arange(len(counts)), [len(c) for c in counts])
+    chosen_ids = _indices(index, chain.from_iterable(counts))
+    values = np.fromiter(
+        chain.from_iterable(c.values() for c in counts), np.float64, len(rows)
+    )
+    totals = np.bincount(rows, weights=values, minlength=len(menus))
+
+    p = np.zeros((n, 1 << n))
+    observed = np.zeros(1 << n, dtype=bool)
+    keep = totals[rows] != 0
+    rows = rows[keep]
+    p[chosen_ids[keep], masks[rows]] = values[keep] / totals[rows]
+    observed[masks[totals != 0]] = True
+
+    singles = 1 << np.arange(n)
+    p[np.arange(n), singles] = 1.0
+    observed[singles] = True
+    return items, p, observed
+
+
+def block_marschak(p, lattice=None):
+    """Block-Marschak polynomials q[x, A] of an (n, 2^n) probability array.
+
+    q[x, A] is only meaningful if x is in A, and set to 0 otherwise. lattice
+    is the (contains, sizes) pair of _lattice(n), computed if not given.
+    """
+    n = p.shape[0]
+    contains, _ = lattice or _lattice(n)
+    q = p.copy()
+    for i in range(n):
+        # menus without item i take away their superset with item i
+        view = q.reshape(n, -1, 2, 1 << i)
+        view[:, :, 0, :] -= view[:, :, 1, :]
+    return np.multiply(q, contains, out=q)
+
+
+def choice_from_flow(q, lattice=None):
+    """Choice probabilities p[x, B] = sum of q[x, A] over A containing B."""
+    n = q.shape[0]
+    contains, _ = lattice or _lattice(n)
+    p = q.copy()
+    for i in range(n):
+        view = p.reshape(n, -1, 2, 1 << i)
+        view[:, :, 0, :] += view[:, :, 1, :]
+    return np.multiply(p, contains, out=p)
+
+
+def repaired_rum(q, lattice=None):
+    """Block-Marschak polynomials of a RUM close to the given ones.
+
+    Rankings are drawn from the top: from the set of items not ranked yet,
+    x is ranked next with probability proportional to max(q[x, A], 0). If q
+    is already non-negative, this gives q back.
+    """
+    n = q.shape[0]
+    contains, sizes = lattice or _lattice(n)
+    weights = np.clip(q, 0, None) * contains
+    totals = weights.sum(axis=0)
+    # with no positive weight left, rank the remaining items uniformly
+    uniform = contains / np.maximum(sizes, 1)
+    share = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), uniform)
+
+    mass = np.zeros(1 << n)
+    mass[-1] = 1.0
+    flow = np.zeros_like(q)
+    for size in range(n, 0, -1):
+        menus = np.flatnonzero(sizes == size)
+        flow[:, menus] = share[:, menus] * mass[menus]
+        for x in range(n):
+            inside = menus[menus >> x & 1 == 1]
+            mass[inside ^ (1 << x)] += flow[x, inside]
+    return flow
+
+
+def nearest_rum_distance(p, observed, lattice=None):
+    """Largest total variation distance to the nearest RUM, by linear programming.
+
+    The variables are a non-negative unit flow f[x, A] down the lattice of
+    menus, which is a RUM, one deviation d[x, B] per observed choice
+    probability and the distance t, which is minimized. Only the observed
+    menus with two or more items are compared.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import bmat, coo_matrix, identity
+
+    n = p.shape[0]
+    n_menus = 1 << n
+    masks = np.arange(n_menus)
+    contains, sizes = lattice or _lattice(n)
+
+    x_of, a_of = np.nonzero(contains)
+    n_flows = len(x_of)
+    flow_index = np.full((n, n_menus), -1)
+    flow_index[x_of, a_of] = np.arange(n_flows)
+
+    # conservation: flow out of a menu minus flow into it is 1 at the top
+    # menu and 0 elsewhere, leaving out the empty menu where it all ends
+    rows = np.concatenate([a_of, a_of ^ (1 << x_of)]) - 1
+    cols = np.tile(np.arange(n_flows), 2)
+    signs = np.repeat([1.0, -1.0], n_flows)
+    keep = rows >= 0
+    conservation = coo_matrix(
+        (signs[keep], (rows[keep], cols[keep])), shape=(n_menus - 1, n_flows)
+    )
+    top = np.zeros(n_menus - 1)
+    top[-1] = 1.0
+
+    # p'[x, B] is the sum of f[x, A] over the menus A containing B
+    menus = np.flatnonzero(observed & (sizes >= 2))
+    x_dev, menu_dev = np.nonzero(contains[:, menus])
+    supersets = (masks[None, :] & menus[:, None]) == menus[:, None]
+    dev_rows, flow_cols = [], []
+    for x in range(n):
+        devs = np.flatnonzero(x_dev == x)
+        r, a = np.nonzero(supersets[menu_dev[devs]])
+        dev_rows.append(devs[r])
+        flow_cols.append(flow_index[x, a])
+    dev_rows, flow_cols = np.concatenate(dev_rows), np.concatenate(flow_cols)
+    n_devs = len(x_dev)
+    implied = coo_matrix(
+        (np.ones(len(dev_rows)), (dev_rows, flow_cols)), shape=(n_devs, n_flows)
+    )
+    target = p[x_dev, menus[menu_dev]]
+
+    # d >= |p - p'| and half the deviations of each menu add up to at most t
+    members = coo_matrix(
+        (np.ones(n_devs), (menu_dev, np.arange(n_devs))), shape=(len(menus), n_devs)
+    )
+    eye = identity(n_devs)
+    bound = coo_matrix(-2 * np.ones((len(menus), 1)))
+    inequalities = bmat(
+        [[-implied, -eye, None], [implied, -eye, None], [None, members, bound]],
+        format="csr",
+    )
+    limits = np.concatenate([-target, target, np.zeros(len(menus))])
+    equalities = bmat(
+        [
+            [
+                conservation,
+                coo_matrix((n_menus - 1, n_devs)),
+                coo_matrix((n_menus - 1, 1)),
+            ]
+        ],
+        format="csr",
+    )
+
+    cost = np.zeros(n_flows + n_devs + 1)
+    cost[-1] = 1.0
+    result = linprog(
+        cost,
+        A_ub=inequalities,
+        b_ub=limits,
+        A_eq=equalities,
+        b_eq=top,
+        bounds=(0, None),
+        method="highs",
+    )
+    return float(result.fun)
+
+
+def _max_variation(p, flow, observed, lattice):
+    """Largest total variation distance between p and the RUM of a flow."""
+    menus = observed & (lattice[1] >= 2)
+    gaps = np.abs(p - choice_from_flow(flow, lattice))[:, menus]
+    return float(gaps.sum(axis=0).max() / 2) if menus.any() else 0.0
+
+
+def _lattice(n):
+    """(n, 2^n) booleans, True where item x is in menu A, and the menu sizes."""
+    contains = np.zeros((n, 1 << n), dtype=bool)
+    for x in range(n):
+        # menus with bit x set come in runs of 2^x
+        contains[x].reshape(-1, 2, 1 << x)[:, 1, :] = True
+    return contains, contains.sum(axis=0)
+
+
+def _indices(index, items):
+    return np.fromiter(map(index.__getitem__, items), np.int64)
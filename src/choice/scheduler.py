@@ -0,0 +1,98 @@
+"""
+Lazy, seeded scheduling of bundles without listing all combinations.
+
+Bundles of each size are numbered by their rank in lexicographic order.
+A seeded pseudo-random permutation of the ranks (a Feistel network with
+cycle walking) gives the order in which they are shown, so drawing the next
+unseen bundle only needs the seed and a position counter: O(1) memory and
+work that does not grow with the session, even when C(n, k) is far too large
+to list.
+"""
+
+import random
+from math import comb
+
+M64 = (1 << 64) - 1
+ROUNDS = 4
+
+
+def unrank_combination(n, k, rank):
+    """Indices of the k-combination of range(n) with the given lexicographic rank."""
+    combo = []
+    x = 0
+    for i in range(k):
+        # skip all combinations that start with x
+        while rank >= (count := comb(n - x - 1, k - i - 1)):
+            rank -= count
+            x += 1
+        combo.append(x)
+        x += 1
+    return combo
+
+
+def _mix(x):
+    """splitmix64 finalizer, a cheap well-mixed hash of a 64-bit integer."""
+    x = (x + 0x9E3779B97F4A7C15) & M64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & M64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & M64
+    return x ^ (x >> 31)
+
+
+class BundleScheduler:
+    """Draws every bundle of the given sizes once, in a seeded random order."""
+
+    def __init__(self, items, sizes=(3,), seed=None):
+        self.items = list(items)
+        self.sizes = tuple(sizes)
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.position = 0
+
+        self.counts = [comb(len(self.items), k) for k in self.sizes]
+        self.total = sum(self.counts)
+
+        # Feistel halves cover at least the rank space, at most 4x of it
+        bits = max(2, (self.total - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+
+    def __len__(self):
+        return self.total
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.position >= self.total:
+            raise StopIteration
+        rank = self.permute(self.position)
+        self.position += 1
+        return self.bundle(rank)
+
+    @property
+    def remaining(self):
+        return self.total - self.position
+
+    def permute(self, i):
+        """Position i of the seeded permutation of range(total)."""
+        # cycle walking: re-encrypt until the result falls inside the range
+        while True:
+            i = self._feistel(i)
+            if i < self.total:
+                return i
+
+    def _feistel(self, x):
+        left, right = x >> self._half, x & self._mask
+        for r in range(ROUNDS):
+            left, right = right, left ^ (
+                _mix(self.seed ^ (r << 56) ^ right) & self._mask
+            )
+        return (left << self._half) | right
+
+    def bundle(self, rank):
+        """Bundle with the given rank: sizes in order, lexicographic within a size."""
+        for k, count in zip(self.sizes, self.counts):
+            if rank < count:
+                ids = unrank_combination(len(self.items), k, rank)
+                return tuple(self.items[i] for i in ids)
+            rank -= count
+        raise IndexError("bundle rank out of range")
@@ -0,0 +1,175 @@
+"""
+Utility representations of consistent choice data.
+
+Menu data: the strongly connected components of the weak revealed
+preference relation R0 are the indifference classes once GARP holds, and
+Tarjan's algorithm labels them in reverse topological order, so the labels
+already are an ordinal utility: x R0 y implies u(x) >= u(y), strictly if
+x P0 y. Labels are ranked densely per subject to give utilities 0, 1, ...
+All subjects are labelled in a single linear-time pass over (subject, item)
+nodes, as in the batch checks.
+
+Budget data: Afriat numbers U_t, lambda_t > 0 solve the Afriat inequalities
+    U_s <= U_t + lambda_t * p_t.(x_s - x_t)   for all t, s,
+and u(x) = min_t U_t + lambda_t * p_t.(x - x_t) then rationalizes the data.
+They are found by a sparse linear program per household, with chunks of
+households spread over a process pool.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from . import afriat as afr
+from . import encoding as enc
+from . import graph
+from . import warp as wrp
+from .parallel import map_chunks
+
+
+def menu_utility(bundles, choices, items=None):
+    """Ordinal utility of every item, higher is better, from consistent choices.
+
+    Raises ValueError if the choices violate GARP, as then no utility
+    represents them.
+    """
+    utility = menu_utilities([(bundles, choices)], items)[0]
+    if utility is None:
+        raise ValueError("Choices violating GARP have no utility representation.")
+    return utility
+
+
+def menu_utilities(dataset, items=None, chunk_size=10_000):
+    """Ordinal utilities of many subjects at once.
+
+    dataset maps each subject id to its (bundles, choices), or is a list of
+    such pairs keyed by position. Returns a dict mapping each subject id to
+    a dict of item to utility, or None if the subject violates GARP.
+    """
+    if not isinstance(dataset, Mapping):
+        dataset = dict(enumerate(dataset))
+
+    subjects = list(dataset)
+    if items is None:
+        items = wrp.item_order(b for s in subjects for b in dataset[s][0])
+    index = {item: j for j, item in enumerate(items)}
+
+    result = {}
+    for start in range(0, len(subjects), chunk_size):
+        chunk = subjects[start : start + chunk_size]
+        data = [dataset[s] for s in chunk]
+        bundles = [b for bundles, _ in data for b in bundles]
+        choices = [c for _, choices in data for c in choices]
+        row_subject = np.repeat(np.arange(len(data)), [len(b) for b, _ in data])
+
+        csr = enc.encode_lists(bundles, choices, index)
+        utilities, consistent = _utilities_csr(*csr, row_subject, len(items), len(data))
+        for subject, row, ok in zip(chunk, utilities.tolist(), consistent.tolist()):
+            result[subject] = dict(zip(items, row)) if ok else None
+    return result
+
+
+def _utilities_csr(
+    menu_ptr, menu_ids, chosen_ptr, chosen_ids, row_subject, n_items, n_subjects
+):
+    n = n_subjects * n_items
+    x, y, weak, strict = enc.subject_pairs(
+        menu_ptr, menu_ids, chosen_ptr, chosen_ids, row_subject, n_items, n_subjects
+    )
+    edges = np.unique(np.column_stack([x[weak], y[weak]]), axis=0)
+    labels = graph.strongly_connected_components(edges, n)
+
+    # GARP fails if a strict edge stays inside a component
+    violated = labels[x[strict & weak]] == labels[y[strict & weak]]
+    consistent = (
+        np.bincount(x[strict & weak][violated] // n_items, minlength=n_subjects) == 0
+    )
+
+    # dense rank of the labels within each subject
+    labels = labels.reshape(n_subjects, n_items)
+    order = np.argsort(labels, axis=1, kind="stable")
+    ordered = np.take_along_axis(labels, order, axis=1)
+    steps = np.zeros_like(ordered)
+    steps[:, 1:] = np.diff(ordered, axis=1) > 0
+    utilities = np.empty_like(ordered)
+    np.put_along_axis(utilities, order, np.cumsum(steps, axis=1), axis=1)
+    return utilities, consistent
+
+
+def afriat_numbers(prices, quantities, chunk_size=1_000, processes=None):
+    """Afriat numbers (U, lambda) of one household or a batch of them.
+
+    prices and quantities are (T, G) arrays, or (H, T, G) arrays for H
+    households. The LPs of the households that pass GARP are solved in
+    chunks of chunk_size on processes worker processes (see
+    parallel.map_chunks). Returns arrays U and lambda of shape (T,) or
+    (H, T), with NaN rows for households that violate GARP. lambda is scaled
+    to be at least 1, the sum of lambda is minimized and the smallest U is 0.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    shape = prices.shape[:-1]
+    prices = prices.reshape(-1, *prices.shape[-2:])
+    quantities = quantities.reshape(-1, *quantities.shape[-2:])
+    n_households, n = prices.shape[:2]
+
+    consistent = np.flatnonzero(afr.check_garp_e(prices, quantities))
+    chunks = [
+        (prices[rows], quantities[rows])
+        for rows in (
+            consistent[i : i + chunk_size]
+            for i in range(0, len(consistent), chunk_size)
+        )
+    ]
+
+    results = map_chunks(_afriat_chunk, chunks, processes)
+    numbers = np.full((2, n_households, n), np.nan)
+    if results:
+        numbers[:, consistent] = np.concatenate(results, axis=1)
+    return numbers[0].reshape(shape), numbers[1].reshape(shape)
+
+
+def _afriat_chunk(prices, quantities):
+    """Afriat numbers of a chunk of households, shape (2, H, T)."""
+    spent = np.einsum("htg,hsg->hts", prices, quantities)
+    # a[h, t, s] = p_t.(x_s - x_t)
+    a = spent - np.diagonal(spent, axis1=1, axis2=2)[:, :, None]
+    return np.stack([solve_afriat(costs) for costs in a], axis=1)
+
+
+def solve_afriat(a):
+    """Solve the Afriat inequalities of one household as a sparse LP.
+
+    a[t, s] = p_t.(x_s - x_t). The constraint of every pair t != s,
+    U_s - U_t - lambda_t * a[t, s] <= 0, has three non-zeros. Returns
+    (U, lambda), NaN if the LP has no solution. Solving households one at
+    a time is faster than stacking them into one block diagonal LP.
+    """
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+    n = len(a)
+    t, s = np.nonzero(~np.eye(n, dtype=bool))
+    rows = np.arange(len(t))
+
+    # variables: U_0, ..., U_{n-1}, lambda_0, ..., lambda_{n-1}
+    inequalities = coo_matrix(
+        (
+            np.concatenate([np.ones(len(rows)), -np.ones(len(rows)), -a[t, s]]),
+            (np.tile(rows, 3), np.concatenate([s, t, n + t])),
+        ),
+        shape=(len(rows), 2 * n),
+    ).tocsr()
+
+    result = linprog(
+        np.r_[np.zeros(n), np.ones(n)],
+        A_ub=inequalities,
+        b_ub=np.zeros(len(rows)),
+        bounds=[(None, None)] * n + [(1, None)] * n,
+        method="highs",
+    )
+    if result.status != 0:
+        return np.full((2, n), np.nan)
+
+    utility, slopes = result.x[:n], result.x[n:]
+    return np.stack([utility - utility.min(), slopes])
@@ -0,0 +1,158 @@
+"""
+Vectorized WARP checker.
+
+Menus and choices are encoded as boolean menu x item matrices, so that all
+pairs of items are checked at once with two matrix products instead of one
+Python loop per pair.
+
+WARP: if x, y are in B_1 and B_2, x in C(B_1) and y in C(B_2),
+then x must be in C(B_2).
+"""
+
+from itertools import chain, islice
+
+import numpy as np
+
+
+def item_order(bundles, items=None):
+    """Return the list of items, in order of first appearance if not given."""
+    if items is not None:
+        return list(items)
+    return list(dict.fromkeys(chain.from_iterable(bundles)))
+
+
+def encode_choices(bundles, choices, items=None):
+    """Encode bundles and choices as boolean menu x item matrices.
+
+    Returns (items, menus, chosen), where menus[i, j] is True if item j was
+    shown in bundle i and chosen[i, j] is True if item j was chosen from it.
+    """
+    items = item_order(bundles, items)
+    index = {item: j for j, item in enumerate(items)}
+
+    menus = np.zeros((len(bundles), len(items)), dtype=bool)
+    chosen = np.zeros((len(bundles), len(items)), dtype=bool)
+    for i, (bundle, choice) in enumerate(zip(bundles, choices)):
+        menus[i, [index[item] for item in bundle]] = True
+        chosen[i, [index[item] for item in choice]] = True
+
+    # choices outside of the shown bundle are ignored
+    chosen &= menus
+    return items, menus, chosen
+
+
+def revealed_relations(menus, chosen):
+    """Return the direct revealed preference relations as item x item matrices.
+
+    weak[x, y]: x was chosen from a bundle where y was available.
+    strict[x, y]: x was chosen from a bundle where y was available but not chosen.
+    """
+    # float32 products go through BLAS; only positivity of the counts matters
+    c = chosen.astype(np.float32)
+    m = menus.astype(np.float32)
+    rejected = (menus & ~chosen).astype(np.float32)
+
+    weak = (c.T @ m) > 0
+    strict = (c.T @ rejected) > 0
+    return weak, strict
+
+
+def warp_matrix(menus, chosen):
+    """Return an item x item matrix of WARP violations.
+
+    violations[x, y] is True if x was chosen from some bundle A with y available,
+    and y was chosen from some bundle B where x was available but not chosen.
+    """
+    weak, strict = revealed_relations(menus, chosen)
+    return weak & strict.T
+
+
+def find_warp_violations(bundles, choices, items=None, limit=None):
+    """Find all pairs of items that violate WARP, up to limit.
+
+    Returns one result per violating pair, in the same format the WARP checker
+    page renders: condition, reason, item_1, item_2, chosen, not_chosen,
+    where chosen and not_chosen are [bundle, choice] witnesses.
+    """
+    return list(iter_warp_violations(bundles, choices, items, limit))
+
+
+def iter_warp_violations(bundles, choices, items=None, limit=None):
+    """Yield the pairs of items that violate WARP, up to limit.
+
+    Witnesses are looked up one item at a time, so the first results come
+    out before the rest are computed.
+    """
+    items, menus, chosen = encode_choices(bundles, choices, items)
+    yield from islice(warp_violations(bundles, choices, items, menus, chosen), limit)
+
+
+def warp_violations(bundles, choices, items, menus, chosen):
+    """Yield the WARP violations of encoded menus and choices.
+
+    Witnesses are looked up by index in bundles and choices, which can be any
+    sequences, e.g. the lazy columns of a ChoiceDataset.
+    """
+    violations = warp_matrix(menus, chosen)
+
+    # report each unordered pair once, oriented by item order
+    pairs = np.argwhere(violations | violations.T)
+    pairs = pairs[pairs[:, 0] < pairs[:, 1]]
+    flip = ~violations[pairs[:, 0], pairs[:, 1]]
+    pairs[flip] = pairs[flip][:, ::-1]
+
+    for x in np.unique(pairs[:, 0]).tolist():
+        ys = pairs[pairs[:, 0] == x, 1]
+        first_a, first_b = witness_rows(menus, chosen, x, ys)
+
+        for y, a, b in zip(ys.tolist(), first_a.tolist(), first_b.tolist()):
+            yield {
+                "condition": True,
+                "reason": "WARP violation detected!",
+                "item_1": items[x],
+                "item_2": items[y],
+                "chosen": [bundles[a], choices[a]],
+                "not_chosen": [bundles[b], choices[b]],
+            }
+
+
+def witness_rows(menus, chosen, x, ys):
+    """Return the first bundles A and B that witness each violating pair (x, y).
+
+    A: x chosen while y available. B: y chosen while x available but not chosen.
+    """
+    rows_a = np.flatnonzero(chosen[:, x])
+    first_a = rows_a[np.argmax(menus[rows_a][:, ys], axis=0)]
+
+    rows_b = np.flatnonzero(menus[:, x] & ~chosen[:, x])
+    first_b = rows_b[np.argmax(chosen[rows_b][:, ys], axis=0)]
+
+    return first_a, first_b
+
+
+def check_warp_pairwise(x, y, bundles, choices):
+    """Check WARP for a single pair of items across all of the bundles."""
+    relevant = [(b, c) for b, c in zip(bundles, choices) if x in b and y in b]
+
+    # check if x, y were chosen at least once across relevant bundles
+    if not any(x in c for _, c in relevant) or not any(y in c for _, c in relevant):
+        return {
+            "condition": False,
+            "reason": "Impossible to detect WARP violation.",
+        }
+
+    for first, second in ((x, y), (y, x)):
+        # first chosen from A, second chosen from B without first
+        chosen = [[b, c] for b, c in relevant if first in c]
+        not_chosen = [[b, c] for b, c in relevant if second in c and first not in c]
+        if chosen and not_chosen:
+            return {
+                "condition": True,
+                "reason": "WARP violation detected!",
+                "item_1": first,
+                "item_2": second,
+                "chosen": chosen[0],
+                "not_chosen": not_chosen[0],
+            }
+
+    return {"condition": False, "reason": "WARP was not violated."}
@@ -0,0 +1,214 @@
+"""
+Cold-start and rerun-latency benchmark of the pages, run headlessly with AppTest.
+
+    python -m src.scripts.benchmark -o benchmark.json
+
+For every page it measures the cold start (the first run in a fresh
+interpreter, once Streamlit itself is loaded), the latency of idle reruns
+and the import time breakdown. The choice page is also played through full
+game sessions: confirms until the game ends, then the WARP check, with
+the latency of every interaction and the peak Python memory of each session.
+Results are saved as JSON together with the commit and the machine, so runs
+of two commits can be compared.
+
+Pages run in a temporary working directory, so the sessions played by the
+benchmark never reach the choice log of the app.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from src.scripts.import_report import import_times, page_imports
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PAGES = ["intro.py", "pages/1_choice_theory.py", "pages/2_cohort_analytics.py"]
+GAME_PAGE = "pages/1_choice_theory.py"
+
+COLD_START = """
+import time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({path!r}, default_timeout=60)
+start = time.perf_counter()
+at.run()
+print(time.perf_counter() - start)
+"""
+
+
+def latency_stats(seconds):
+    """Count, mean and percentiles of latencies, in milliseconds."""
+    ms = np.asarray(seconds) * 1000
+    if not len(ms):
+        return {"n": 0}
+    return {
+        "n": len(ms),
+        "mean": float(ms.mean()),
+        "p50": float(np.percentile(ms, 50)),
+        "p90": float(np.percentile(ms, 90)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+    }
+
+
+def cold_start(page):
+    """Seconds of the first run of a page in a fresh interpreter."""
+    # a new interpreter, so nothing the page imports is loaded yet
+    code = COLD_START.format(path=os.path.join(ROOT, page))
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.split()[-1])
+
+
+def rerun_latencies(page, reruns):
+    """Seconds of reruns of a page without any interaction."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=60).run()
+    seconds = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def play_session(strategy, max_rounds):
+    """Play one game on the choice page, and return its timings.
+
+    strategy "first" always picks the first fruit (consistent choices),
+    "rotate" picks a different fruit each round (choices that violate WARP).
+    """
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, GAME_PAGE), default_timeout=60).run()
+    confirms = []
+    for round in range(max_rounds):
+        buttons = [b for b in at.button if b.label == "Confirm Choices"]
+        if not buttons:
+            break
+        boxes = at.checkbox
+        boxes[0 if strategy == "first" else round % len(boxes)].check()
+        start = time.perf_counter()
+        # confirming reruns the script once more to show the next bundle
+        at = buttons[0].click().run().run()
+        confirms.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    at = [b for b in at.button if b.label.startswith("Check for")][0].click().run()
+    # rerun until the background check is done
+    while len(at.get("progress")):
+        at = at.run()
+    check = time.perf_counter() - start
+    return {"rounds": len(confirms), "confirms": confirms, "check": check}
+
+
+def game_sessions(sessions, max_rounds):
+    """Timings and peak Python memory of game sessions of both strategies."""
+    result = {}
+    for strategy in ("first", "rotate"):
+        confirms, checks, rounds, peaks = [], [], [], []
+        for _ in range(sessions):
+            tracemalloc.start()
+            session = play_session(strategy, max_rounds)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 2**20)
+            tracemalloc.stop()
+
+            confirms += session["confirms"]
+            checks.append(session["check"])
+            rounds.append(session["rounds"])
+        result[strategy] = {
+            "rounds": rounds,
+            "confirm_ms": latency_stats(confirms),
+            "check_ms": latency_stats(checks),
+            "peak_memory_mb": max(peaks),
+        }
+    return result
+
+
+def run(pages, sessions, max_rounds, reruns):
+    """Benchmark the pages and return the results as a dict."""
+    results = {
+        "commit": _commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "pages": {},
+    }
+    for page in pages:
+        imports = import_times(page_imports(os.path.join(ROOT, page)))
+        results["pages"][page] = {
+            "cold_start_ms": cold_start(page) * 1000,
+            "rerun_ms": latency_stats(rerun_latencies(page, reruns)),
+            "import_ms": {name: us / 1000 for name, us in imports.items()},
+        }
+    if GAME_PAGE in pages and sessions:
+        results["pages"][GAME_PAGE]["game"] = game_sessions(sessions, max_rounds)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.scripts.benchmark",
+        description="Benchmark cold starts and reruns of the Streamlit pages.",
+    )
+    parser.add_argument("pages", nargs="*", default=PAGES, help="pages to run")
+    parser.add_argument("-o", "--output", help="JSON file for the results")
+    parser.add_argument(
+        "--sessions", type=int, default=3, help="games per strategy (default: 3)"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=50, help="most confirms per game (default: 50)"
+    )
+    parser.add_argument(
+        "--reruns", type=int, default=20, help="idle reruns per page (default: 20)"
+    )
+    args = parser.parse_args(argv)
+
+    # pages read styles from src/ and write their logs to data/, relative to
+    # the working directory, so run them in a scratch copy of the root
+    sys.path.insert(0, ROOT)
+    os.environ["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [ROOT, os.environ.get("PYTHONPATH")])
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in ("src", ".streamlit"):
+            os.symlink(os.path.join(ROOT, name), os.path.join(scratch, name))
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            results = run(args.pages, args.sessions, args.rounds, args.reruns)
+        finally:
+            os.chdir(cwd)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
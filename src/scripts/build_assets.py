@@ -0,0 +1,134 @@
+"""
+Build the stylesheets of the pages into small self-contained bundles.
+
+    python -m src.scripts.build_assets
+
+Each bundle is one minified stylesheet of the styles of some pages, plus
+the icons of src/icons that those pages actually use (found by their
+`icon-<name>` class), as CSS masks with inline SVG. The pages inline their
+bundle with utl.bundled_css, so the first paint needs no request to a font
+or icon CDN.
+Bundles are saved under a content hash in src/styles/dist, with a
+manifest.json of the current file of each bundle. Rerun after editing the
+styles, the icons or the icons used in the pages, and commit the result.
+
+Icons are drawn like Font Awesome ones, e.g. for the LinkedIn icon:
+
+    <i class="icon icon-linkedin icon-lg"></i>
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from urllib.parse import quote
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ICONS_DIR = os.path.join(ROOT, "src", "icons")
+DIST_DIR = os.path.join(ROOT, "src", "styles", "dist")
+# bundle name: (stylesheets in src/styles in cascade order, pages using it)
+BUNDLES = {
+    "home": (["styles_home.css"], ["intro.py"]),
+    "pages": (["styles_pages.css"], ["pages/*.py"]),
+}
+
+# sized like Font Awesome glyphs, and drawn in the color of the text
+ICON_CSS = (
+    ".icon{display:inline-block;height:1em;vertical-align:-.125em;"
+    "background-color:currentColor;"
+    "-webkit-mask:var(--icon) center/contain no-repeat;"
+    "mask:var(--icon) center/contain no-repeat}"
+    ".icon-lg{font-size:1.33333em;line-height:.75em;vertical-align:-.0667em}"
+)
+
+
+def minify_css(css):
+    """css without comments and without whitespace that has no meaning."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    # spaces before a colon may start a pseudo-class, so only strip after it
+    css = re.sub(r" ?([{};,>]) ?", r"\1", css)
+    css = re.sub(r": ", ":", css)
+    return css.replace(";}", "}").strip()
+
+
+def used_icons(pages):
+    """Names of the icons of src/icons used in the pages, given as globs."""
+    available = {
+        os.path.splitext(name)[0]
+        for name in os.listdir(ICONS_DIR)
+        if name.endswith(".svg")
+    }
+    used = set()
+    for pattern in pages:
+        for path in glob.glob(os.path.join(ROOT, pattern)):
+            with open(path, encoding="utf-8") as f:
+                used.update(re.findall(r"\bicon-([\w-]+)", f.read()))
+    return sorted(used & available)
+
+
+def icon_css(names):
+    """One rule per icon, with its SVG as an inline mask image."""
+    rules = []
+    for name in names:
+        with open(os.path.join(ICONS_DIR, f"{name}.svg"), encoding="utf-8") as f:
+            svg = re.sub(r"<!--.*?-->", "", f.read(), flags=re.S).strip()
+        _, _, width, height = re.search(r'viewBox="([^"]+)"', svg).group(1).split()
+        rules.append(
+            f".icon-{name}{{width:{float(width) / float(height):.4g}em;"
+            f"--icon:url(\"data:image/svg+xml,{quote(svg, safe=' /=:;,.-')}\")}}"
+        )
+    return "".join(rules)
+
+
+def build():
+    """Write the bundles and their manifest, and return the manifest."""
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = {}
+    for bundle, (stylesheets, pages) in BUNDLES.items():
+        icons = used_icons(pages)
+        parts = []
+        for name in stylesheets:
+            with open(os.path.join(ROOT, "src", "styles", name)) as f:
+                parts.append(minify_css(f.read()))
+        if icons:
+            parts.append(
+                "/*! Font Awesome Free 5.15.3 icons by @fontawesome - "
+                "https://fontawesome.com/license/free (CC BY 4.0) */"
+            )
+            parts.append(ICON_CSS + icon_css(icons))
+        css = "\n".join(parts) + "\n"
+
+        digest = hashlib.sha256(css.encode()).hexdigest()[:10]
+        manifest[bundle] = f"{bundle}.{digest}.css"
+        with open(os.path.join(DIST_DIR, manifest[bundle]), "w") as f:
+            f.write(css)
+
+    # drop the bundles of earlier builds
+    for name in os.listdir(DIST_DIR):
+        if name.endswith(".css") and name not in manifest.values():
+            os.remove(os.path.join(DIST_DIR, name))
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.scripts.build_assets",
+        description="Build the minified stylesheet and icon bundles of the pages.",
+    )
+    parser.parse_args(argv)
+
+    manifest = build()
+    for bundle, name in manifest.items():
+        size = os.path.getsize(os.path.join(DIST_DIR, name))
+        icons = ", ".join(used_icons(BUNDLES[bundle][1])) or "no icons"
+        print(f"{bundle}: src/styles/dist/{name} ({size:,} bytes, {icons})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Check the verdicts of the adaptive menu scheduler against the full GARP check.
+
+    python -m src.scripts.check_adaptive --sessions 1000 --items 6
+
+Plays random sessions with choosers who pick a uniformly random non-empty
+subset of every menu. After every answer, the scheduler must flag a
+violation exactly when find_garp_violations finds one in the answers so far,
+so no session ends as "consistent" while its choices violate GARP. Exits
+with status 1 on the first session where they disagree.
+"""
+
+import argparse
+import random
+import sys
+
+from src import choice as chc
+
+FRUITS = ["Apple", "Banana", "Mango", "Orange"]
+
+
+def play(items, size, rng):
+    """Play one random session, and return its verdict and first disagreement."""
+    scheduler = chc.AdaptiveScheduler(items, sizes=(size,), seed=rng.getrandbits(64))
+    bundles, choices = [], []
+    bundle = scheduler.next_bundle()
+    while bundle is not None:
+        choice = set(rng.sample(bundle, rng.randint(1, len(bundle))))
+        bundles.append(bundle)
+        choices.append(choice)
+        scheduler.record(bundle, choice)
+
+        violated = bool(chc.find_garp_violations(bundles, choices, limit=1))
+        if (scheduler.violation is not None) != violated:
+            return scheduler.verdict, {
+                "bundles": bundles,
+                "choices": choices,
+                "violation": scheduler.violation,
+                "garp_violated": violated,
+            }
+        bundle = scheduler.next_bundle()
+    return scheduler.verdict, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.scripts.check_adaptive",
+        description="Compare adaptive scheduler verdicts with the GARP check.",
+    )
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument(
+        "--items", type=int, default=len(FRUITS), help="number of items"
+    )
+    parser.add_argument("--size", type=int, default=3, help="items per menu")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    items = FRUITS if args.items == len(FRUITS) else list(range(args.items))
+    rng = random.Random(args.seed)
+    verdicts = {"consistent": 0, "inconsistent": 0}
+    for session in range(args.sessions):
+        verdict, mismatch = play(items, args.size, rng)
+        if mismatch is not None:
+            print(f"session {session}: {mismatch}")
+            sys.exit(1)
+        verdicts[verdict] += 1
+    print(
+        f"{args.sessions} sessions agree with find_garp_violations "
+        f"({verdicts['consistent']} consistent, "
+        f"{verdicts['inconsistent']} inconsistent)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Import time report of the pages, to keep cold starts cheap.
+
+    python -m src.scripts.import_report intro.py pages/*.py
+
+Runs the top-level import statements of each page in a fresh interpreter
+with -X importtime, and lists the total time and the slowest packages.
+"""
+
+import argparse
+import ast
+import subprocess
+import sys
+
+
+def page_imports(path):
+    """Source of the import statements at the top level of a page."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    imports = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(n) for n in imports)
+
+
+def import_times(code):
+    """Cumulative import time in microseconds of each top-level module of code.
+
+    Modules the interpreter imports at startup are left out.
+    """
+    startup = _top_level_times("pass")
+    return {
+        name: us for name, us in _top_level_times(code).items() if name not in startup
+    }
+
+
+def _top_level_times(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # nested imports are indented below the module that imported them
+        if not name[1:].startswith(" "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m src.scripts.import_report",
+        description="Report the import time of Streamlit pages.",
+    )
+    parser.add_argument("pages", nargs="+", help="page scripts, e.g. intro.py")
+    parser.add_argument(
+        "--top", type=int, default=5, help="slowest packages to list (default: 5)"
+    )
+    args = parser.parse_args(argv)
+
+    for page in args.pages:
+        times = import_times(page_imports(page))
+        print(f"{page}: {sum(times.values()) / 1000:.0f} ms")
+        slowest = sorted(times.items(), key=lambda item: item[1], reverse=True)
+        for name, us in slowest[: args.top]:
+            print(f"    {us / 1000:8.0f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,163 +1,190 @@
-import matplotlib.cm as cm
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
-
-# Sample template from plotly documentation
-# https://plotly.com/python/templates/
-pio.templates["draft"] = go.layout.Template(
-    layout_annotations=[
-        dict(
-            name="draft watermark",
-            text="DRAFT",
-            textangle=-30,
-            opacity=0.1,
-            font=dict(color="black", size=100),
-            xref="paper",
-            yref="paper",
-            x=0.5,
-            y=0.5,
-            showarrow=False,
-        )
-    ]
-)
+"""
+Plotly templates and color lists, built on first use.
+
+Importing this module is cheap: plotly and matplotlib are only imported,
+and the templates only built and registered, when a chart first asks for a
+template with template() or reads one of the color lists.
+"""
+
+import functools
 
 my_font = "Sans-Serif"
 my_font_color = "black"
 
-# Personal template for streamlit charts
-pio.templates["my_streamlit"] = go.layout.Template(
-    layout=dict(
-        # Font options - streamlit overwrites those based on config.toml file
-        font={
-            "family": my_font,
-            "size": 12,
-            "color": my_font_color,
-        },
-        # Title options
-        title=dict(
-            # text="",
-            font={
-                "family": my_font,
-                "size": 25,
-                "color": my_font_color,
-            },
-            x=0.00,
-            xanchor="left",
-            xref="paper",
-            y=0.98,
-            yanchor="top",
-            yref="container",
-        ),
-        # Legend options
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            x=-0.01,
-            xanchor="left",
-            y=1.00,
-            yanchor="bottom",
-            # bgcolor="red",
-            # bordercolor="#333",
-            # borderwidth=2,
-            entrywidth=0,
-            entrywidthmode="pixels",
+
+def template(name="my_streamlit"):
+    """Name of a plotly template, registering the templates on first use."""
+    _register_templates()
+    return name
+
+
+@functools.cache
+def _register_templates():
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    # Sample template from plotly documentation
+    # https://plotly.com/python/templates/
+    pio.templates["draft"] = go.layout.Template(
+        layout_annotations=[
+            dict(
+                name="draft watermark",
+                text="DRAFT",
+                textangle=-30,
+                opacity=0.1,
+                font=dict(color="black", size=100),
+                xref="paper",
+                yref="paper",
+                x=0.5,
+                y=0.5,
+                showarrow=False,
+            )
+        ]
+    )
+
+    # Personal template for streamlit charts
+    pio.templates["my_streamlit"] = go.layout.Template(
+        layout=dict(
+            # Font options - streamlit overwrites those based on config.toml file
             font={
                 "family": my_font,
                 "size": 12,
                 "color": my_font_color,
             },
-            itemclick="toggle",
-            # tracegroupgap=10,
-            traceorder="normal",
-            valign="middle",
-        ),
-        # Paper options
-        margin=dict(autoexpand=True, l=70, r=40, t=25, b=40, pad=0),
-        width=500,
-        height=400,
-        autosize=False,
-        paper_bgcolor="white",  # doesn't work with streamlit
-        plot_bgcolor="white",  # doesn't work with streamlit
-        separators=".,",
-        # Chart interaction options
-        dragmode=False,  # zoom
-        # Hover options
-        hovermode="closest",
-        hoverlabel=dict(
-            font=dict(family=my_font, color=my_font_color),
-            # bgcolor="rgb(255, 255, 255)",  # rgb(0, 0, 0, 0)
-            bordercolor="black",
-            namelength=-1,
-        ),
-        # Gride options
-        grid=dict(columns=2, rows=2, domain=dict(x=[0, 1], y=[0, 1])),
-        # Axes options
-        xaxis=dict(
-            automargin=False,
-            autorange=True,
-            categoryorder="sum descending",
-            color="black",
-            gridcolor="white",
-            showline=True,
-            linecolor="black",
-            linewidth=2,
-            ticks="outside",
-            tickcolor="black",
-            tickformat="%b %Y",
-            title=dict(standoff=0, text=""),
-            zerolinecolor="black",
-            zerolinewidth=2,
-            layer="above traces",
-            showticklabels=True,
-            showspikes=True,
-            spikethickness=1,
-        ),
-        yaxis=dict(
-            automargin="left+right",
-            autorange=True,
-            categoryorder="sum descending",
-            color="black",
-            gridcolor="lightgrey",
-            gridwidth=0.5,
-            showline=True,
-            linecolor="black",
-            linewidth=2,
-            ticks="",
-            tickformat="$,.0f",
+            # Title options
             title=dict(
-                standoff=0,
-                text="",
+                # text="",
+                font={
+                    "family": my_font,
+                    "size": 25,
+                    "color": my_font_color,
+                },
+                x=0.00,
+                xanchor="left",
+                xref="paper",
+                y=0.98,
+                yanchor="top",
+                yref="container",
+            ),
+            # Legend options
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                x=-0.01,
+                xanchor="left",
+                y=1.00,
+                yanchor="bottom",
+                # bgcolor="red",
+                # bordercolor="#333",
+                # borderwidth=2,
+                entrywidth=0,
+                entrywidthmode="pixels",
+                font={
+                    "family": my_font,
+                    "size": 12,
+                    "color": my_font_color,
+                },
+                itemclick="toggle",
+                # tracegroupgap=10,
+                traceorder="normal",
+                valign="middle",
+            ),
+            # Paper options
+            margin=dict(autoexpand=True, l=70, r=40, t=25, b=40, pad=0),
+            width=500,
+            height=400,
+            autosize=False,
+            paper_bgcolor="white",  # doesn't work with streamlit
+            plot_bgcolor="white",  # doesn't work with streamlit
+            separators=".,",
+            # Chart interaction options
+            dragmode=False,  # zoom
+            # Hover options
+            hovermode="closest",
+            hoverlabel=dict(
                 font=dict(family=my_font, color=my_font_color),
+                # bgcolor="rgb(255, 255, 255)",  # rgb(0, 0, 0, 0)
+                bordercolor="black",
+                namelength=-1,
             ),
-            separatethousands=True,
-            zerolinecolor="black",
-            zerolinewidth=2,
-            layer="above traces",
-            rangemode="tozero",
+            # Gride options
+            grid=dict(columns=2, rows=2, domain=dict(x=[0, 1], y=[0, 1])),
+            # Axes options
+            xaxis=dict(
+                automargin=False,
+                autorange=True,
+                categoryorder="sum descending",
+                color="black",
+                gridcolor="white",
+                showline=True,
+                linecolor="black",
+                linewidth=2,
+                ticks="outside",
+                tickcolor="black",
+                tickformat="%b %Y",
+                title=dict(standoff=0, text=""),
+                zerolinecolor="black",
+                zerolinewidth=2,
+                layer="above traces",
+                showticklabels=True,
+                showspikes=True,
+                spikethickness=1,
+            ),
+            yaxis=dict(
+                automargin="left+right",
+                autorange=True,
+                categoryorder="sum descending",
+                color="black",
+                gridcolor="lightgrey",
+                gridwidth=0.5,
+                showline=True,
+                linecolor="black",
+                linewidth=2,
+                ticks="",
+                tickformat="$,.0f",
+                title=dict(
+                    standoff=0,
+                    text="",
+                    font=dict(family=my_font, color=my_font_color),
+                ),
+                separatethousands=True,
+                zerolinecolor="black",
+                zerolinewidth=2,
+                layer="above traces",
+                rangemode="tozero",
+            ),
+            colorway=px.colors.qualitative.G10,
         ),
-        colorway=px.colors.qualitative.G10,
-    ),
-    data=dict(
-        scatter=[
-            go.Scatter(
-                line=dict(width=4),
-                marker=dict(symbol="diamond", size=8),
-                mode="lines",
-                connectgaps=False,
-                # hovertemplate="%{fullData.name}<br>%{x}:%{y}<extra></extra>",
-                hovertemplate="%{x}<br>%{y}<extra></extra>",
-                xhoverformat="%b %Y",
-                yhoverformat="$,.0f",
-            )
-        ]
-    ),
-)
+        data=dict(
+            scatter=[
+                go.Scatter(
+                    line=dict(width=4),
+                    marker=dict(symbol="diamond", size=8),
+                    mode="lines",
+                    connectgaps=False,
+                    # hovertemplate="%{fullData.name}<br>%{x}:%{y}<extra></extra>",
+                    hovertemplate="%{x}<br>%{y}<extra></extra>",
+                    xhoverformat="%b %Y",
+                    yhoverformat="$,.0f",
+                )
+            ]
+        ),
+    )
+
+
+def __getattr__(name):
+    # color lists, looked up on first access
+    if name in ("cols_g10", "cols_set1"):
+        import plotly.express as px
 
-cols_g10 = px.colors.qualitative.G10
-cols_set1 = px.colors.qualitative.Set1
+        palette = {"cols_g10": "G10", "cols_set1": "Set1"}[name]
+        return getattr(px.colors.qualitative, palette)
+    if name == "cols_set1_plt":
+        import matplotlib.cm as cm
 
-cols_set1_plt = cm.Set1.colors
+        return cm.Set1.colors
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 """
@@ -1,9 +1,31 @@
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
 import streamlit as st
+from PIL import Image
+
+# Stylesheet bundles, see src/scripts/build_assets.py
+DIST_DIR = "src/styles/dist"
+# Opt-in rerun profiler: set PROFILE_RERUNS=1, or open a page with ?profile=1
+PROFILE_ENV = "PROFILE_RERUNS"
+# Latest timings kept per block, besides the running count and sum
+PROFILE_HISTORY = 100
 
 
 def local_css(file_path):
-    with open(file_path) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+    with timed(f"css {file_path}"):
+        st.markdown(_asset(file_path, _style), unsafe_allow_html=True)
+
+
+def bundled_css(bundle):
+    # a stylesheet bundle built by src/scripts/build_assets.py
+    manifest = _asset(os.path.join(DIST_DIR, "manifest.json"), _json)
+    local_css(os.path.join(DIST_DIR, manifest[bundle]))
 
 
 def external_css(file_url):
@@ -21,17 +43,195 @@ def micro_page_config():
 
 
 def wide_col():
-    return st.columns((0.01, 1, 0.01))
+    return _columns((0.01, 1, 0.01))
 
 
 def narrow_col():
-    return st.columns((0.35, 1, 0.35))
+    return _columns((0.35, 1, 0.35))
 
 
 # This is narrow_col_intro - not sure why Streamlit doesn't find it
 def narrow_col_intro():
-    return st.columns((0.1, 1, 0.1))
+    return _columns((0.1, 1, 0.1))
 
 
 def two_cols():
-    return st.columns((0.1, 1, 0.2, 1, 0.1))
+    return _columns((0.1, 1, 0.2, 1, 0.1))
+
+
+def image(file_path, width):
+    # the image is resized to the displayed width once per process, so reruns
+    # only send the small copy; Streamlit serves it under a content hash
+    st.image(_asset(file_path, _resized_jpeg, width), width=width)
+
+
+def register_pages(file_path=".streamlit/pages.toml"):
+    # like st_pages.show_pages_from_config, but the TOML is parsed only once
+    from st_pages import show_pages
+
+    show_pages(_asset(file_path, _pages))
+
+
+### STATIC ASSETS ###
+
+# assets loaded by this process, by (path, loader, args), with their mtime
+_assets = {}
+
+
+def _asset(file_path, load, *args):
+    # load(file_path, *args) once, and again only when the file changes
+    mtime = os.stat(file_path).st_mtime_ns
+    key = (file_path, load, args)
+    cached = _assets.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = _assets[key] = (mtime, load(file_path, *args))
+    return cached[1]
+
+
+def _json(file_path):
+    with open(file_path) as f:
+        return json.load(f)
+
+
+def _style(file_path):
+    with open(file_path) as f:
+        return f"<style>{f.read()}</style>"
+
+
+def _resized_jpeg(file_path, width):
+    # a JPEG no wider than width, which st.image passes on without decoding
+    with Image.open(file_path) as img:
+        img = img.convert("RGB")
+        if img.width > width:
+            height = round(img.height * width / img.width)
+            img = img.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        img.save(buffer, format="JPEG", quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _pages(file_path):
+    import toml
+    from st_pages import Page, Section
+
+    with open(file_path, encoding="utf-8") as f:
+        config = toml.load(f)
+    return [
+        (
+            Section(page["name"], page.get("icon"))
+            if page.get("is_section")
+            else Page(**page)
+        )
+        for page in config["pages"]
+    ]
+
+
+### RERUN PROFILER ###
+
+
+def profiling():
+    # decided once per session, so the query string is only parsed once
+    if "_profiling" not in st.session_state:
+        if hasattr(st, "query_params"):
+            params = st.query_params
+        else:
+            params = st.experimental_get_query_params()
+        st.session_state._profiling = bool(os.environ.get(PROFILE_ENV)) or (
+            "profile" in params
+        )
+    return st.session_state._profiling
+
+
+@contextmanager
+def timed(block):
+    # time a block of the page script, e.g. with utl.timed("WARP check"):
+    if not profiling():
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(block, time.perf_counter() - start)
+
+
+def _record(block, seconds):
+    timings = st.session_state.setdefault("_timings", {})
+    timing = timings.setdefault(
+        block, {"count": 0, "sum": 0.0, "recent": deque(maxlen=PROFILE_HISTORY)}
+    )
+    timing["count"] += 1
+    timing["sum"] += seconds
+    timing["recent"].append(seconds)
+
+
+class _TimedColumn:
+    # a column that times each `with column:` block, named after its line
+    def __init__(self, column):
+        self._column = column
+        self._blocks = []
+
+    def __getattr__(self, name):
+        return getattr(self._column, name)
+
+    def __enter__(self):
+        caller = sys._getframe(1)
+        block = f"{os.path.basename(caller.f_code.co_filename)}:{caller.f_lineno}"
+        self._blocks.append((block, time.perf_counter()))
+        return self._column.__enter__()
+
+    def __exit__(self, *exc):
+        try:
+            return self._column.__exit__(*exc)
+        finally:
+            block, start = self._blocks.pop()
+            _record(block, time.perf_counter() - start)
+
+
+def _columns(spec):
+    columns = st.columns(spec)
+    if not profiling():
+        return columns
+    return [_TimedColumn(column) for column in columns]
+
+
+def openmetrics():
+    # timings of this session in the OpenMetrics text format
+    lines = [
+        "# TYPE page_block_seconds summary",
+        "# UNIT page_block_seconds seconds",
+        "# HELP page_block_seconds Time spent in a block of a page script.",
+    ]
+    for block, timing in st.session_state.get("_timings", {}).items():
+        label = block.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        lines.append(f'page_block_seconds_count{{block="{label}"}} {timing["count"]}')
+        lines.append(f'page_block_seconds_sum{{block="{label}"}} {timing["sum"]:.6f}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def profile_panel():
+    # sidebar panel with the timings of this session, only when profiling
+    if not profiling():
+        return
+    timings = st.session_state.get("_timings", {})
+    rows = [
+        {
+            "block": block,
+            "last_ms": 1000 * timing["recent"][-1],
+            "mean_ms": 1000 * timing["sum"] / timing["count"],
+            "max_ms": 1000 * max(timing["recent"]),
+            "runs": timing["count"],
+        }
+        for block, timing in timings.items()
+    ]
+    with st.sidebar.expander("Rerun profile", expanded=True):
+        st.dataframe(
+            sorted(rows, key=lambda row: row["mean_ms"], reverse=True),
+            hide_index=True,
+        )
+        st.download_button(
+            "Download as OpenMetrics",
+            openmetrics(),
+            file_name="rerun_profile.txt",
+        )